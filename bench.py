@@ -0,0 +1,239 @@
+"""
+Benchmarks for the engine hot paths.
+
+    python bench.py -o results.json                   # run everything, write JSON
+    python bench.py --filter evaluate --quick         # a subset, fewer iterations
+    python bench.py --compare baseline.json           # run and flag regressions
+    python bench.py --input results.json --compare baseline.json
+
+Every benchmark times ``ops`` operations on inputs prepared outside the timer and
+reports the best of ``repeat`` runs in nanoseconds per operation. ``--compare``
+exits with status 1 if any benchmark is slower than the baseline by more than
+``--threshold`` (a fraction, 0.10 by default).
+"""
+from typing import Callable, Dict, List, Optional, Tuple
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from evalcache import EvaluationCache
+from game import Game
+from hand import PokerHand, rank_classes
+from headless import HeadlessInterface, game_seed, play_game
+from physical import CARDS, Deck, Suit
+from policy import GreedyPolicy
+
+FORMAT_VERSION = 1
+
+# A benchmark prepares inputs for ``ops`` operations and returns the timed callable.
+Benchmark = Callable[[int], Callable[[], None]]
+
+BENCHMARKS: Dict[str, Tuple[Benchmark, int]] = {}
+
+def benchmark(name: str, ops: int):
+    def register(prepare: Benchmark) -> Benchmark:
+        BENCHMARKS[name] = (prepare, ops)
+        return prepare
+    return register
+
+def _hands_by_category(size: int, per_category: int = 256) -> Dict[int, List[List]]:
+    """Return up to ``per_category`` concrete hands of each category, covering every rank class."""
+    hands: Dict[int, List[List]] = {}
+    suits = list(Suit)
+    for values, strength, flush in rank_classes(size):
+        if any(values.count(value) > 4 for value in values):
+            # Five of a kind needs a second deck; with one suit per position it would
+            # repeat a card.
+            continue
+        # Adjacent copies of a value get different suits, and the hand is never single-suited.
+        cards = [CARDS[(suits[i % 4].value - 1) * 13 + value - 2] for i, value in enumerate(values)]
+        hands.setdefault(strength >> 20, []).append(cards)
+        if flush is not None:
+            hands.setdefault(flush >> 20, []).append([CARDS[value - 2] for value in values])
+    rng = random.Random(size)
+    for category, group in hands.items():
+        if len(group) > per_category:
+            hands[category] = rng.sample(group, per_category)
+    return hands
+
+_CATEGORY_NAMES = {value: name.lower() for name, value in vars(PokerHand).items() if name.isupper() and isinstance(value, int)}
+
+def _register_evaluate():
+    for size in (3, 4, 5):
+        for category, hands in sorted(_hands_by_category(size).items()):
+            name = _CATEGORY_NAMES[category]
+
+            def prepare(ops: int, hands=hands):
+                pool = [PokerHand(hands[i % len(hands)]) for i in range(ops)]
+                return lambda: [hand.evaluate() for hand in pool]
+
+            benchmark(f"evaluate/{size}/{name}", 2000)(prepare)
+
+_register_evaluate()
+
+@benchmark("evaluate/cached", 2000)
+def _cached(ops: int):
+    rng = random.Random(0)
+    pool = [rng.sample(CARDS, 5) for _ in range(ops)]
+    cache = EvaluationCache()
+    for cards in pool:
+        cache.strength(cards)
+    return lambda: [cache.strength(cards) for cards in pool]
+
+@benchmark("deck/new_and_shuffle", 5000)
+def _deck(ops: int):
+    rng = random.Random(0)
+    def run():
+        for _ in range(ops):
+            Deck().shuffle(rng)
+    return run
+
+@benchmark("game/setup", 2000)
+def _setup(ops: int):
+    games = [Game(['A', 'B'], rng=random.Random(i)) for i in range(ops)]
+    return lambda: [game.setup() for game in games]
+
+@benchmark("game/setup_from_deal", 2000)
+def _setup_from_deal(ops: int):
+    from deals import shuffled_decks
+    decks = shuffled_decks(ops, 0)
+    games = [Game(['A', 'B'], rng=random.Random(i)) for i in range(ops)]
+    return lambda: [game.setup(deck) for game, deck in zip(games, decks)]
+
+@benchmark("deals/shuffled_decks", 5000)
+def _shuffled_decks(ops: int):
+    from deals import shuffled_decks
+    return lambda: shuffled_decks(ops, 0)
+
+def _set_up_games(ops: int, seed: int, ready: Callable[[Game], bool] = lambda game: True) -> List[Game]:
+    """Return ``ops`` freshly dealt 2-player games, played by greedy policies, that satisfy ``ready``."""
+    games = []
+    index = 0
+    while len(games) < ops:
+        rng = random.Random(game_seed(seed, index))
+        index += 1
+        interface = HeadlessInterface({'A': GreedyPolicy(random.Random(rng.random())), 'B': GreedyPolicy(random.Random(rng.random()))})
+        game = Game(['A', 'B'], interface, rng)
+        interface.game = game
+        game.setup()
+        if ready(game):
+            games.append(game)
+    return games
+
+def _handle(method: str, seed: int, ready: Callable[[Game], bool] = lambda game: True) -> Benchmark:
+    def prepare(ops: int):
+        games = _set_up_games(ops, seed, ready)
+        return lambda: [getattr(game, method)(game.players[0]) for game in games]
+    return prepare
+
+benchmark("game/handle_deck_action", 2000)(_handle('handle_deck_action', 1))
+benchmark("game/handle_treasure_action", 2000)(_handle('handle_treasure_action', 2))
+benchmark("game/handle_challenge_action", 1000)(_handle('handle_challenge_action', 3))
+benchmark("game/handle_store_action", 1000)(_handle('handle_store_action', 4, lambda game: game.players[0].has_pair()))
+
+@benchmark("game/determine_winner", 1000)
+def _determine_winner(ops: int):
+    finished = [play_game(game_seed(5, i), (GreedyPolicy, GreedyPolicy), 200) for i in range(20)]
+    games = [finished[i % len(finished)] for i in range(ops)]
+    return lambda: [game.determine_winner() for game in games]
+
+@benchmark("headless/full_game", 10)
+def _full_game(ops: int):
+    seeds = [game_seed(6, i) for i in range(ops)]
+    return lambda: [play_game(seed, (GreedyPolicy, GreedyPolicy), 500) for seed in seeds]
+
+def run_benchmarks(names: Optional[List[str]] = None, repeat: int = 5, scale: float = 1.0) -> Dict:
+    """
+    Run the named benchmarks (all by default).
+
+    Returns:
+        Dict: The JSON-ready results: environment details and, per benchmark, the
+        best and mean time per operation in nanoseconds.
+    """
+    results = {}
+    for name in names if names is not None else BENCHMARKS:
+        prepare, ops = BENCHMARKS[name]
+        ops = max(1, int(ops * scale))
+        timings = []
+        for _ in range(repeat):
+            run = prepare(ops)
+            start = time.perf_counter_ns()
+            run()
+            timings.append((time.perf_counter_ns() - start) / ops)
+        results[name] = {'ns_per_op': min(timings), 'mean_ns_per_op': sum(timings) / len(timings), 'ops': ops, 'repeat': repeat}
+    return {
+        'version': FORMAT_VERSION,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'results': results,
+    }
+
+def compare(current: Dict, baseline: Dict, threshold: float = 0.10) -> List[str]:
+    """
+    Compare two result sets and print a report, including the baseline benchmarks
+    missing from ``current``.
+
+    Returns:
+        List[str]: The benchmarks slower than the baseline by more than ``threshold``.
+    """
+    regressions = []
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            print(f"{name:45s} {result['ns_per_op']:12.0f} ns      (new)")
+            continue
+        ratio = result['ns_per_op'] / base['ns_per_op']
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = 'REGRESSION'
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            flag = 'improved'
+        print(f"{name:45s} {result['ns_per_op']:12.0f} ns  {ratio:6.2f}x  {flag}")
+    for name, base in baseline['results'].items():
+        if name not in current['results']:
+            print(f"{name:45s} {base['ns_per_op']:12.0f} ns      (missing: in the baseline only)")
+    return regressions
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the Dragons Hoard engine.")
+    parser.add_argument('-o', '--output', help="Write the results to this JSON file.")
+    parser.add_argument('--input', help="Compare these stored results instead of running the benchmarks.")
+    parser.add_argument('--compare', metavar='BASELINE', help="Flag regressions against this results file.")
+    parser.add_argument('--threshold', type=float, default=0.10)
+    parser.add_argument('--filter', default='', help="Only run benchmarks whose name contains this.")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--quick', action='store_true', help="Run a tenth of the operations.")
+    parser.add_argument('--list', action='store_true', help="List the benchmarks and exit.")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print('\n'.join(BENCHMARKS))
+        return 0
+    if args.input:
+        with open(args.input) as file:
+            current = json.load(file)
+    else:
+        names = [name for name in BENCHMARKS if args.filter in name]
+        current = run_benchmarks(names, args.repeat, 0.1 if args.quick else 1.0)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(current, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) above {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+    elif not args.output or args.input:
+        for name, result in current['results'].items():
+            print(f"{name:45s} {result['ns_per_op']:12.0f} ns")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,42 @@
+"""
+Batched deal generation with NumPy.
+
+A deal is the order of a shuffled shoe, as card uids (``Card.uid``) with the top
+of the deck last, like ``Deck.codes``. ``shuffled_decks`` draws M deals at once by
+argsorting a matrix of random keys, so a batch costs a handful of array operations
+instead of M Python shuffles. The same generator seed always gives the same deals,
+so two rule variants or policies can be compared on identical deals.
+
+Pass a row to ``Game.setup`` (or ``Game.play``/``Game.start``, or
+``headless.play_game``), or a whole array to ``vector.VectorGame.reset``.
+"""
+from typing import Iterator, Union
+import numpy as np
+from physical import MAX_SMALL_DECKS
+
+Seed = Union[None, int, np.random.SeedSequence, np.random.Generator]
+
+def shuffled_decks(count: int, rng: Seed = None, decks: int = 1) -> np.ndarray:
+    """
+    Return ``count`` independent shuffles of a shoe of ``decks`` standard decks.
+
+    Args:
+        count (int): The number of deals, M.
+        rng: A ``numpy.random.Generator``, or a seed to create one from.
+        decks (int): The number of standard decks in the shoe.
+
+    Returns:
+        numpy.ndarray: An ``(M, 52 * decks)`` array of card uids, top of the deck
+        last: ``uint8`` for shoes of up to 4 decks (the bytes of ``Deck.codes``),
+        ``uint16`` above.
+    """
+    generator = rng if isinstance(rng, np.random.Generator) else np.random.default_rng(rng)
+    keys = generator.random((count, 52 * decks))
+    dtype = np.uint8 if decks <= MAX_SMALL_DECKS else np.uint16
+    return np.argsort(keys, axis=1).astype(dtype)
+
+def deal_stream(total: int, rng: Seed = None, decks: int = 1, batch: int = 4096) -> Iterator[np.ndarray]:
+    """Yield ``total`` deals in ``(batch, 52 * decks)`` arrays (the last one may be shorter)."""
+    generator = rng if isinstance(rng, np.random.Generator) else np.random.default_rng(rng)
+    for start in range(0, total, batch):
+        yield shuffled_decks(min(batch, total - start), generator, decks)
@@ -0,0 +1,71 @@
+from itertools import combinations
+from typing import Dict, List, Tuple
+from physical import Card
+from hand import PokerHand
+
+# The strength of the weakest storable hand: a pair.
+_MIN_STRENGTH = PokerHand.PAIR << 20
+
+def storable_hands(cards: List[Card]) -> Dict[int, int]:
+    """
+    Return every storable 5-card hand (a pair or better) among ``cards``.
+
+    Returns:
+        Dict[int, int]: The strength of each hand, keyed by the hand as a bitmask of
+        positions in ``cards``.
+    """
+    hands = {}
+    for positions in combinations(range(len(cards)), 5):
+        strength = PokerHand([cards[i] for i in positions]).strength()
+        if strength >= _MIN_STRENGTH:
+            hands[sum(1 << i for i in positions)] = strength
+    return hands
+
+def solve(cards: List[Card]) -> Tuple[List[List[Card]], Tuple[int, ...]]:
+    """
+    Find the best set of disjoint storable 5-card hands that ``cards`` can form.
+
+    Sets are compared by their hand strengths sorted strongest first, compared
+    lexicographically: the strongest hand decides (as in ``Game.determine_winner``),
+    then the next one, and a longer set wins a tie on every hand it shares.
+
+    The search is a dynamic program over subsets of ``cards``, memoized by bitmask:
+    the lowest remaining card is either left out or stored in one of the hands it
+    is the lowest card of, so each subset is solved once. A 13-card hand has at most
+    8192 subsets and 1287 candidate hands.
+
+    Args:
+        cards (List[Card]): The cards to store from (e.g. a player's hand).
+
+    Returns:
+        Tuple[List[List[Card]], Tuple[int, ...]]: The hands to store, strongest
+        first, and their strengths (both empty if no hand can be stored).
+    """
+    hands = storable_hands(cards)
+    by_lowest: List[List[Tuple[int, int]]] = [[] for _ in cards]
+    for mask, strength in hands.items():
+        by_lowest[(mask & -mask).bit_length() - 1].append((mask, strength))
+
+    # memo[mask] is the best (strengths, hands) using only the cards in mask.
+    memo: Dict[int, Tuple[Tuple[int, ...], Tuple[int, ...]]] = {}
+
+    def best(mask: int) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+        if mask.bit_count() < 5:
+            return (), ()
+        found = memo.get(mask)
+        if found is not None:
+            return found
+        lowest = mask & -mask
+        found = best(mask ^ lowest)
+        for hand, strength in by_lowest[lowest.bit_length() - 1]:
+            if hand & mask == hand:
+                strengths, chosen = best(mask ^ hand)
+                candidate = tuple(sorted(strengths + (strength,), reverse=True))
+                if candidate > found[0]:
+                    found = (candidate, chosen + (hand,))
+        memo[mask] = found
+        return found
+
+    strengths, chosen = best((1 << len(cards)) - 1)
+    stored = sorted(chosen, key=hands.__getitem__, reverse=True)
+    return [[cards[i] for i in range(len(cards)) if hand >> i & 1] for hand in stored], strengths
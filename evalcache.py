@@ -0,0 +1,123 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import json
+from physical import Card
+from hand import PokerHand
+
+FORMAT_VERSION = 1
+
+# A canonical hand: its card values, encoded as a histogram with 3 bits per value
+# (the same for every order of the cards, like the sorted values), and the rank
+# bitmask of each suit in ascending order. Suits are only compared with each other,
+# so every relabelling of the suits (every isomorphic hand) has the same key.
+HandKey = Tuple[int, Tuple[int, ...]]
+
+def hand_key(cards: List[Card]) -> HandKey:
+    """Return the canonical, suit-isomorphic key of a hand."""
+    ranks = 0
+    suits = [0, 0, 0, 0]
+    for card in cards:
+        ranks += 1 << 3 * card.value
+        suits[card.code // 13] |= 1 << card.value
+    suits.sort()
+    return ranks, tuple(suits)
+
+class EvaluationCache:
+    """
+    A bounded, least-recently-used cache of hand strengths.
+
+    Hands are keyed by ``hand_key``, so hands that only differ by a permutation of
+    the suits share an entry. Strengths are those of ``PokerHand.strength``.
+
+    Attributes:
+        maxsize (int): The largest number of entries kept; the least recently used
+            entry is evicted beyond it.
+        hits (int): The number of lookups answered from the cache.
+        misses (int): The number of lookups that had to evaluate the hand.
+        evictions (int): The number of entries evicted.
+    """
+
+    def __init__(self, maxsize: int = 1 << 16, path: Optional[str] = None):
+        if maxsize < 1:
+            raise ValueError("The cache needs room for at least one entry")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: 'OrderedDict[HandKey, int]' = OrderedDict()
+        if path is not None:
+            self.load(path)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, cards: List[Card]) -> bool:
+        return hand_key(cards) in self._entries
+
+    def strength(self, cards: List[Card]) -> int:
+        """Return ``PokerHand(cards).strength()``, from the cache if possible."""
+        key = hand_key(cards)
+        entries = self._entries
+        strength = entries.get(key)
+        if strength is not None:
+            self.hits += 1
+            entries.move_to_end(key)
+            return strength
+
+        self.misses += 1
+        strength = PokerHand(cards).strength()
+        entries[key] = strength
+        if len(entries) > self.maxsize:
+            entries.popitem(last=False)
+            self.evictions += 1
+        return strength
+
+    def evaluate(self, cards: List[Card]) -> Tuple[int, List[int]]:
+        """Return ``PokerHand(cards).evaluate()``, from the cache if possible."""
+        return PokerHand.unpack(self.strength(cards), len(cards))
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> Dict:
+        """Return the counters as JSON-ready data."""
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hit_rate,
+        }
+
+    def clear(self):
+        """Drop every entry and reset the counters."""
+        self._entries.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def save(self, path: str):
+        """Write the entries to a JSON file, least recently used first."""
+        entries = [[ranks, list(suits), strength] for (ranks, suits), strength in self._entries.items()]
+        with open(path, 'w') as file:
+            json.dump({'version': FORMAT_VERSION, 'entries': entries}, file)
+
+    def load(self, path: str):
+        """
+        Add the entries of a file written by ``save``, as if just used.
+
+        Raises:
+            ValueError: If the file is not a cache file of this version.
+        """
+        with open(path) as file:
+            data = json.load(file)
+        if not isinstance(data, dict) or data.get('version') != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} evaluation cache")
+        entries = self._entries
+        for ranks, suits, strength in data['entries']:
+            key = (ranks, tuple(suits))
+            entries[key] = strength
+            entries.move_to_end(key)
+        while len(entries) > self.maxsize:
+            entries.popitem(last=False)
@@ -0,0 +1,368 @@
+from typing import BinaryIO, Dict, List, Optional, Sequence
+import mmap
+import struct
+from game import Game, Action
+from state import GameState
+
+# Every record is 8 bytes: a kind byte, three small fields and a 32-bit field.
+#
+#   kind        a           b           c                   n
+#   START       players     decks       0                   game number in the file
+#   DECK        card        card        card                4 more cards (7 per record, 0xFF padded; top of the deck last)
+#   DEALT       0           0           0                   0
+#   MOVE        card        source      destination         turn
+#   REVEAL      player      size        card                4 more cards (0xFF padded)
+#   CHALLENGE   challenger  opponent    ranks (c << 4 | o)  turn
+#   TURN        player      action      success             turn
+#   END         winner      0           0                   turns played
+#   STORE       player      size        0                   turn (followed by the hand's MOVE records)
+#
+# Cards are their uids (``Card.uid``), so shoes of up to MAX_DECKS decks fit.
+# Locations are MAIN, TREASURE, HAND + player and STORED + player; actions are
+# indices into ACTIONS. The file starts with a header of the same size: MAGIC and
+# the format version.
+RECORD = struct.Struct('<BBBBI')
+MAGIC = b'DHLOG\x00'
+VERSION = 2
+HEADER = MAGIC + struct.pack('<H', VERSION)
+
+START, DECK, DEALT, MOVE, REVEAL, CHALLENGE, TURN, END, STORE = range(9)
+MAIN, TREASURE, HAND, STORED = 0, 1, 2, 0x80
+ACTIONS = (Action.DECK, Action.TREASURE, Action.CHALLENGE, Action.STORE)
+NONE = 0xFF
+MAX_DECKS = 4
+
+RECORD_DTYPE = [('kind', 'u1'), ('a', 'u1'), ('b', 'u1'), ('c', 'u1'), ('n', '<u4')]
+
+def _pack_cards(codes: Sequence[int], width: int) -> List[int]:
+    codes = list(codes) + [NONE] * (width - len(codes))
+    return codes[:3] + [int.from_bytes(bytes(codes[3:width]), 'little')]
+
+def _unpack_cards(a: int, b: int, c: int, n: int) -> List[int]:
+    return [code for code in (a, b, c, *n.to_bytes(4, 'little')) if code != NONE]
+
+class EventLog:
+    """
+    Appends the games played with it to a binary event log.
+
+    Attach a game with ``record`` before playing it; the game then reports every card
+    movement, revealed challenge hand, challenge outcome and turn to the log. Records
+    are buffered and written in blocks.
+
+    Attributes:
+        file (BinaryIO): The log file, opened for appending.
+        games (int): The number of games started in this file so far.
+    """
+
+    def __init__(self, path: str, buffer_size: int = 1 << 16):
+        self.file: BinaryIO = open(path, 'ab')
+        if self.file.tell() == 0:
+            self.file.write(HEADER)
+            self.games = 0
+        else:
+            reader = EventLogReader(path)
+            self.games = reader.games
+            reader.close()
+        self._buffer = bytearray()
+        self._buffer_size = buffer_size
+        self._game: Optional[Game] = None
+
+    def __enter__(self) -> 'EventLog':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def record(self, game: Game):
+        """Log ``game`` from its setup on; call before ``play`` or ``start``."""
+        if game.main_deck.decks > MAX_DECKS:
+            raise ValueError(f"Event logs hold one byte per card, so at most {MAX_DECKS} decks")
+        game.add_recorder(self)
+
+    def flush(self):
+        self.file.write(self._buffer)
+        self._buffer.clear()
+        self.file.flush()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def _write(self, kind: int, a: int, b: int, c: int, n: int):
+        self._buffer += RECORD.pack(kind, a, b, c, n)
+        if len(self._buffer) >= self._buffer_size:
+            self.flush()
+
+    # Called by Game.
+
+    def start(self, game: Game):
+        self._game = game
+        self._write(START, len(game.players), game.main_deck.decks, 0, self.games)
+        self.games += 1
+        codes = game.main_deck.codes
+        for i in range(0, len(codes), 7):
+            self._write(DECK, *_pack_cards(codes[i:i + 7], 7))
+
+    def dealt(self):
+        self._write(DEALT, 0, 0, 0, 0)
+
+    def _move(self, code: int, source: int, destination: int):
+        self._write(MOVE, code, source, destination, self._game.turn)
+
+    def draw(self, player: int, code: int):
+        self._move(code, MAIN, HAND + player)
+
+    def refill(self, code: int):
+        self._move(code, MAIN, TREASURE)
+
+    def swap(self, player: int, hand_code: int, treasure_code: int):
+        self._move(hand_code, HAND + player, TREASURE)
+        self._move(treasure_code, TREASURE, HAND + player)
+
+    def take_treasure(self, player: int, code: int):
+        self._move(code, TREASURE, HAND + player)
+
+    def store(self, player: int, codes: Sequence[int]):
+        self._write(STORE, player, len(codes), 0, self._game.turn)
+        for code in codes:
+            self._move(code, HAND + player, STORED + player)
+
+    def reveal(self, player: int, codes: Sequence[int]):
+        size = len(codes)
+        codes = list(codes) + [NONE] * (5 - size)
+        self._write(REVEAL, player, size, codes[0], int.from_bytes(bytes(codes[1:]), 'little'))
+
+    def challenge(self, challenger: int, opponent: int, challenger_rank: int, opponent_rank: int):
+        self._write(CHALLENGE, challenger, opponent, challenger_rank << 4 | opponent_rank, self._game.turn)
+
+    def turn(self, player: int, action: Action, success: bool):
+        index = ACTIONS.index(action) if action in ACTIONS else NONE
+        self._write(TURN, player, index, int(bool(success)), self._game.turn)
+
+    def end(self, winner: int):
+        self._write(END, winner, 0, 0, self._game.turn)
+        self._game = None
+
+class LogStats:
+    """
+    Aggregate statistics of the games in an event log.
+
+    Attributes:
+        games (int): The number of finished games.
+        turns (int): The total number of turns played in them.
+        wins_by_seat (List[int]): The number of games won from each seat.
+        actions (Dict[Action, List[int]]): For each action, the number of failed and
+            successful attempts.
+        challenges (int): The number of challenges played.
+        challenger_wins (int): The number of challenges won by the challenger.
+        winning_ranks (List[int]): The number of challenges won with each hand rank.
+        stored_hands (int): The number of hands stored.
+    """
+
+    def __init__(self):
+        self.games = 0
+        self.turns = 0
+        self.wins_by_seat: List[int] = []
+        self.actions: Dict[Action, List[int]] = {action: [0, 0] for action in ACTIONS}
+        self.challenges = 0
+        self.challenger_wins = 0
+        self.winning_ranks = [0] * 11
+        self.stored_hands = 0
+
+    def __repr__(self):
+        return (
+            f"LogStats(games={self.games}, turns={self.turns}, wins_by_seat={self.wins_by_seat}, "
+            f"challenges={self.challenges}, challenger_wins={self.challenger_wins}, stored_hands={self.stored_hands})"
+        )
+
+class EventLogReader:
+    """
+    Memory-maps an event log for replay and analytics.
+
+    Attributes:
+        path (str): The log file.
+        records (int): The number of records in the file, after the header.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as file:
+            if file.read(len(HEADER)) != HEADER:
+                raise ValueError(f"{path} is not a version {VERSION} event log")
+            size = file.seek(0, 2)
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        self.records = (len(self._map) - len(HEADER)) // RECORD.size
+        self._starts: Optional[List[int]] = None
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+
+    def _records(self, start: int = 0, stop: Optional[int] = None):
+        stop = self.records if stop is None else stop
+        offset = len(HEADER)
+        return RECORD.iter_unpack(memoryview(self._map)[offset + start * RECORD.size:offset + stop * RECORD.size])
+
+    def _game_starts(self) -> List[int]:
+        if self._starts is None:
+            try:
+                import numpy as np
+            except ImportError:
+                self._starts = [i for i, record in enumerate(self._records()) if record[0] == START]
+            else:
+                kinds = np.frombuffer(self._map, dtype=RECORD_DTYPE, offset=len(HEADER), count=self.records)['kind']
+                self._starts = np.flatnonzero(kinds == START).tolist()
+        return self._starts
+
+    @property
+    def games(self) -> int:
+        """The number of games started in the log."""
+        return len(self._game_starts())
+
+    def replay(self, game: int, turn: Optional[int] = None) -> GameState:
+        """
+        Rebuild the state of a logged game.
+
+        Args:
+            game: The index of the game in the log.
+            turn: The number of turns to replay; the whole game by default. 0 replays
+                only the setup.
+
+        Returns:
+            GameState: The state after ``turn`` turns.
+
+        Raises:
+            ValueError: If a card movement contradicts the replayed state.
+        """
+        starts = self._game_starts()
+        stop = starts[game + 1] if game + 1 < len(starts) else self.records
+        records = self._records(starts[game], stop)
+        players = next(records)[1]
+        state = GameState(bytearray(), [], [0] * players, [() for _ in range(players)])
+
+        for kind, a, b, c, n in records:
+            if kind == DECK:
+                state.deck += bytes(_unpack_cards(a, b, c, n))
+            elif kind == MOVE:
+                self._move(state, a, b, c)
+            elif kind == STORE:
+                state.stored[a] += (0,)
+            elif kind == DEALT:
+                if turn == 0:
+                    break
+            elif kind == END:
+                break
+            elif kind == TURN:
+                state.current = (a + 1) % players
+                state.turn = n + 1
+                if turn is not None and state.turn >= turn:
+                    break
+        return state
+
+    def _move(self, state: GameState, code: int, source: int, destination: int):
+        if source == MAIN:
+            if not state.deck or state.deck[-1] != code:
+                raise ValueError(f"Card {code} is not on top of the main deck")
+            state.deck.pop()
+        elif source == TREASURE:
+            state.treasure.remove(code)
+        else:
+            player = source - HAND
+            if not state.hands[player] >> code & 1:
+                raise ValueError(f"Card {code} is not in player {player}'s hand")
+            state.hands[player] &= ~(1 << code)
+
+        if destination == TREASURE:
+            state.treasure.append(code)
+        elif destination >= STORED:
+            # Into the hand opened by the last STORE record of the player.
+            player = destination - STORED
+            stored = state.stored[player]
+            state.stored[player] = stored[:-1] + (stored[-1] | 1 << code,)
+        else:
+            state.hands[destination - HAND] |= 1 << code
+
+    def stats(self, chunk: int = 1 << 20) -> LogStats:
+        """
+        Aggregate statistics over every game in the log.
+
+        The records are scanned with NumPy in chunks of ``chunk`` records straight from
+        the memory map, so no per-event Python objects are created.
+        """
+        import numpy as np
+
+        stats = LogStats()
+        wins = np.zeros(256, dtype=np.int64)
+        actions = np.zeros(2 * len(ACTIONS), dtype=np.int64)
+        ranks = np.zeros(16, dtype=np.int64)
+        records = np.frombuffer(self._map, dtype=RECORD_DTYPE, offset=len(HEADER), count=self.records)
+        for start in range(0, self.records, chunk):
+            block = records[start:start + chunk]
+            kind = block['kind']
+
+            ends = block[kind == END]
+            stats.games += len(ends)
+            stats.turns += int(ends['n'].sum())
+            wins += np.bincount(ends['a'], minlength=256)
+
+            turns = block[(kind == TURN) & (block['b'] < len(ACTIONS))]
+            actions += np.bincount(turns['b'].astype(np.intp) * 2 + turns['c'], minlength=len(actions))
+
+            challenges = block['c'][kind == CHALLENGE]
+            challenger, opponent = challenges >> 4, challenges & 15
+            stats.challenges += len(challenges)
+            stats.challenger_wins += int((challenger > opponent).sum())
+            ranks += np.bincount(np.maximum(challenger, opponent), minlength=16)
+
+            stats.stored_hands += int((kind == STORE).sum())
+
+        seats = int(np.flatnonzero(wins).max()) + 1 if wins.any() else 0
+        stats.wins_by_seat = wins[:seats].tolist()
+        for i, action in enumerate(ACTIONS):
+            stats.actions[action] = actions[2 * i:2 * i + 2].tolist()
+        stats.winning_ranks = ranks[:11].tolist()
+        return stats
+
+def check_replay(path: str, n_games: int = 40, seed: int = 0, players: int = 2, max_turns: int = 3000) -> int:
+    """
+    Log ``n_games`` greedy games to ``path``, replay each one and compare it with
+    the final state of the game, stored hands included.
+
+    Returns:
+        int: The number of games that ended in the lock condition.
+
+    Raises:
+        ValueError: If a replayed game differs from the game.
+    """
+    from headless import game_seed, play_game
+    from policy import GreedyPolicy
+
+    finals = []
+    with EventLog(path) as log:
+        first = log.games
+        for index in range(n_games):
+            game = play_game(game_seed(seed, index), (GreedyPolicy,) * players, max_turns, recorder=log)
+            finals.append((game.locked, GameState.from_game(game)))
+    reader = EventLogReader(path)
+    try:
+        for index, (_, final) in enumerate(finals):
+            replayed = reader.replay(first + index)
+            if (bytes(replayed.deck), replayed.treasure, replayed.hands, replayed.stored) != (bytes(final.deck), final.treasure, final.hands, final.stored):
+                raise ValueError(f"The replay of game {first + index} differs from the game")
+    finally:
+        reader.close()
+    return sum(locked for locked, _ in finals)
+
+if __name__ == '__main__':
+    import argparse
+    import os
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Check that logged games replay to their final state.")
+    parser.add_argument('--games', type=int, default=40)
+    parser.add_argument('--players', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        locked = check_replay(os.path.join(directory, 'check.log'), args.games, args.seed, args.players)
+    print(f"{args.games} games replayed to their final state ({locked} locked)")
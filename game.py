@@ -1,9 +1,11 @@
 from enum import Enum
-from typing import List
+from typing import Any, Generator, Iterable, List, Optional, Tuple
 from player import Player
-from physical import Deck, Card
+from physical import Card, CardPile, Deck, decks_for
 from ui import UserInterface
 from hand import PokerHand
+from endgame import solve
+from math import comb
 import random
 
 class Action(Enum):
@@ -12,189 +14,567 @@ class Action(Enum):
     CHALLENGE = 'C'
     STORE = 'S'
 
+class DecisionKind(Enum):
+    """The decisions the engine can wait on, named after the interface method that answers them."""
+    ACTION = 'get_player_action'
+    CARD_FROM_HAND = 'get_card_from_hand'
+    CARD_FROM_TREASURE = 'get_card_from_treasure'
+    OPPONENT = 'select_opponent'
+    CHALLENGE_SIZE = 'get_challenge_hand_size'
+    CARDS = 'select_cards'
+    DRAW_SOURCE = 'choose_draw_source'
+
+class PendingDecision:
+    """
+    A decision the engine is waiting on before it can continue.
+
+    Attributes:
+        kind (DecisionKind): What is being decided.
+        player (Player): The player who must decide.
+        args (Tuple): The arguments of the matching ``UserInterface`` call.
+        events (List[Tuple[str, Tuple]]): The interface notifications (method name and
+            arguments, e.g. ``('display_message', (text,))``) raised since the previous
+            decision, in order.
+    """
+
+    def __init__(self, kind: DecisionKind, player: Player, args: Tuple):
+        self.kind = kind
+        self.player = player
+        self.args = args
+        self.events: List[Tuple[str, Tuple]] = []
+
+# Full rounds without progress, once the main deck is empty, before the game locks.
+LOCK_ROUNDS = 3
+
+# An engine step: yields the decisions it needs and returns the action's result.
+Steps = Generator[PendingDecision, Any, Any]
+
+class Recorder:
+    """
+    A game recorder that ignores every call; subclass it and override the calls of
+    interest (see ``Game.add_recorder``). Cards are passed as uids and players as
+    seat indices.
+    """
+
+    def start(self, game: 'Game'):
+        """The game was set up; its main deck is still full."""
+
+    def dealt(self):
+        """The initial hands and the treasure deck were dealt."""
+
+    def draw(self, player: int, uid: int):
+        """``player`` drew a card from the main deck."""
+
+    def refill(self, uid: int):
+        """A card moved from the main deck to the treasure deck."""
+
+    def swap(self, player: int, hand_uid: int, treasure_uid: int):
+        """``player`` swapped a hand card for a treasure card."""
+
+    def take_treasure(self, player: int, uid: int):
+        """``player`` took the oldest treasure card after winning a challenge."""
+
+    def store(self, player: int, uids: List[int]):
+        """``player`` stored a hand."""
+
+    def reveal(self, player: int, uids: List[int]):
+        """``player`` showed a challenge hand."""
+
+    def challenge(self, challenger: int, opponent: int, challenger_rank: int, opponent_rank: int):
+        """A challenge was decided on the hand ranks."""
+
+    def turn(self, player: int, action: Action, success: bool):
+        """``player``'s turn ended."""
+
+    def end(self, winner: int):
+        """The game ended."""
+
+class RecorderGroup:
+    """
+    Forwards the engine's recorder calls to several recorders, in order.
+
+    Attributes:
+        recorders (List): The recorders, e.g. an ``EventLog`` and a ``CardTracker``.
+    """
+
+    def __init__(self, recorders: List):
+        self.recorders = recorders
+
+    def __getattr__(self, name: str):
+        methods = [getattr(recorder, name) for recorder in self.recorders]
+
+        def forward(*args):
+            for method in methods:
+                method(*args)
+        # Later calls find the forwarder directly.
+        setattr(self, name, forward)
+        return forward
+
 class Game:
     """
     Represents the Dragons Hoard game and manages the game state.
 
+    The rules are written as generators that yield a ``PendingDecision`` whenever a
+    player has to choose something. ``start``/``step`` expose them directly, so a
+    caller can answer decisions whenever (and from wherever) they arrive; ``play``
+    and the ``handle_*`` methods answer them synchronously from ``interface``.
+
     Attributes:
         players (List[Player]): The list of players in the game.
-        main_deck (Deck): The main deck of cards.
-        treasure_deck (List[Card]): The face-up cards in the treasure deck.
+        main_deck (Deck): The main deck of cards: one standard deck per 3 players.
+        treasure_deck (CardPile): The face-up cards in the treasure deck, oldest first.
         current_player_index (int): The index of the current player.
-        interface (UserInterface): The user interface for the game.
+        interface (Optional[UserInterface]): The user interface for the game, if it is
+            played synchronously.
+        rng (random.Random): The random number generator used for shuffling and tie-breaks.
+        turn (int): The number of turns played so far.
+        winner (Optional[Player]): The winner, once the game has been played.
+        locked (bool): Whether the game ended in the lock condition (see ``_check_lock``).
+        recorder (Optional[EventLog]): Receives every card movement, challenge and turn
+            if set (see ``add_recorder`` and ``eventlog.EventLog.record``).
+        instrumentation (Optional[Instrumentation]): Collects per-action counts and
+            timings if set (see ``instrument.Instrumentation``).
+        evaluation_cache (Optional[EvaluationCache]): Memoizes the engine's hand
+            evaluations if set (see ``evalcache.EvaluationCache``).
     """
 
-    def __init__(self, player_names: List[str], interface: UserInterface):
-        if len(player_names) not in [2, 3]:
-            raise ValueError("This implementation supports exactly 3 players.")
-        
+    def __init__(self, player_names: List[str], interface: Optional[UserInterface] = None, rng: Optional[random.Random] = None):
+        if len(player_names) < 2:
+            raise ValueError("The game needs at least 2 players.")
+
         self.players = [Player(name) for name in player_names]
-        self.main_deck = Deck()
-        self.treasure_deck: List[Card] = []
+        self.main_deck = Deck(decks_for(len(player_names)))
+        self.treasure_deck = CardPile()
         self.current_player_index = 0
         self.interface = interface
+        self.rng = rng if rng is not None else random.Random()
+        self.turn = 0
+        self.winner: Optional[Player] = None
+        self.locked = False
+        self.recorder = None
+        self.instrumentation = None
+        self.evaluation_cache = None
+        self._events: List[Tuple[str, Tuple]] = []
+        self._engine: Optional[Steps] = None
+        self._pending: Optional[PendingDecision] = None
+        self._progress: Optional[Tuple[int, int]] = None
+        self._quiet_turns = 0
+
+    def setup(self, deck: Optional[Iterable[int]] = None):
+        """
+        Set up the game by dealing cards and creating the treasure deck.
+
+        Args:
+            deck: The order of the main deck to deal from, as card uids with the top of
+                the deck last (e.g. a row of ``deals.shuffled_decks``); the main deck is
+                shuffled with ``rng`` by default.
+        """
+        if deck is None:
+            self.main_deck.shuffle(self.rng)
+        else:
+            self.main_deck.arrange(deck)
+        recorder = self.recorder
+        if recorder:
+            recorder.start(self)
 
-    def setup(self):
-        """Set up the game by dealing cards and creating the treasure deck."""
-        self.main_deck.shuffle()
-        
         # Deal 7 cards to each player
-        for player in self.players:
-            for _ in range(7):
-                card = self.main_deck.draw()
-                if card:
-                    player.add_card(card)
+        for index, player in enumerate(self.players):
+            for card in self.main_deck.deal(7):
+                player.add_card(card)
+                if recorder:
+                    recorder.draw(index, card.uid)
 
         # Set up the treasure deck
-        for _ in range(9):
-            card = self.main_deck.draw()
-            if card:
-                self.treasure_deck.append(card)
+        for card in self.main_deck.deal(9):
+            self.treasure_deck.append(card)
+            if recorder:
+                recorder.refill(card.uid)
+        if recorder:
+            recorder.dealt()
 
-    def play(self):
-        """Main game loop."""
-        self.setup()
+    def play(self, max_turns: Optional[int] = None, deck: Optional[Iterable[int]] = None) -> Player:
+        """Main game loop. Stop after ``max_turns`` turns if given, and return the winner."""
+        decision = self.start(max_turns, deck)
+        while decision is not None:
+            self._deliver(decision.events)
+            decision = self.step(self._answer(decision))
+        self._deliver(self.drain_events())
+        return self.winner
 
-        while not self.is_game_over():
-            current_player = self.players[self.current_player_index]
-            self.interface.display_game_state(self)
-            
-            action = self.interface.get_player_action(current_player)
-            self.handle_action(current_player, action)
+    def start(self, max_turns: Optional[int] = None, deck: Optional[Iterable[int]] = None) -> Optional[PendingDecision]:
+        """
+        Set up the game (dealing ``deck`` if given, see ``setup``) and run it until the
+        first decision.
 
-            self.current_player_index = (self.current_player_index + 1) % len(self.players)
+        Returns:
+            Optional[PendingDecision]: The first decision to answer with ``step``.
+        """
+        self._engine = self._run(max_turns, deck)
+        return self._advance(next, self._engine)
+
+    def step(self, answer: Any) -> Optional[PendingDecision]:
+        """
+        Answer the pending decision and run the game until the next one.
+
+        Args:
+            answer: The answer, of the type the matching ``UserInterface`` method returns.
+
+        Returns:
+            Optional[PendingDecision]: The next decision, or None once the game is over
+            (its final notifications are then available from ``drain_events``).
+
+        Raises:
+            ValueError: If there is no pending decision or the answer is not valid for it;
+                the game state is left unchanged.
+        """
+        if self._pending is None:
+            raise ValueError("The game is not waiting on a decision.")
+        self._validate(self._pending, answer)
+        return self._advance(self._engine.send, answer)
+
+    def drain_events(self) -> List[Tuple[str, Tuple]]:
+        """Return and clear the interface notifications raised since the last decision."""
+        events, self._events = self._events, []
+        return events
+
+    def add_recorder(self, recorder):
+        """
+        Report every card movement, challenge and turn to ``recorder`` (see ``Recorder``),
+        as well as to any recorder already set.
+        """
+        if self.recorder is None:
+            self.recorder = recorder
+        elif isinstance(self.recorder, RecorderGroup):
+            self.recorder = RecorderGroup(self.recorder.recorders + [recorder])
+        else:
+            self.recorder = RecorderGroup([self.recorder, recorder])
 
-        winner = self.determine_winner()
-        self.interface.display_winner(winner)
+    def available_actions(self, player: Player) -> List[Action]:
+        """Return the actions that can currently succeed for the player."""
+        actions = []
+        if len(player.hand) < 13 and self.main_deck:
+            actions.append(Action.DECK)
+        if self.treasure_deck and player.hand:
+            actions.append(Action.TREASURE)
+        if len(player.hand) >= 3 and any(p is not player and len(p.hand) >= 3 for p in self.players):
+            actions.append(Action.CHALLENGE)
+        if len(player.hand) >= 5:
+            actions.append(Action.STORE)
+        return actions
 
     def handle_action(self, player: Player, action: Action) -> bool:
         """Handle the player's chosen action. Return True if action was successful, False otherwise."""
+        steps = self._instrumented_action(player, action) if self.instrumentation else self._action(player, action)
+        return self._drive(steps)
+
+    def handle_deck_action(self, player: Player) -> bool:
+        """Handle the deck action: draw a card from the main deck."""
+        return self._drive(self._action(player, Action.DECK))
+
+    def handle_treasure_action(self, player: Player) -> bool:
+        """Handle the treasure action: swap a card with the treasure deck."""
+        return self._drive(self._treasure_action(player))
+
+    def handle_challenge_action(self, player: Player) -> bool:
+        """Handle the challenge action: challenge another player to a poker hand duel."""
+        return self._drive(self._challenge_action(player))
+
+    def draw_cards_after_challenge(self, player: Player, num_cards: int):
+        """Allow the challenge winner to draw cards."""
+        self._drive(self._draw_cards_after_challenge(player, num_cards))
+
+    def handle_store_action(self, player: Player) -> bool:
+        """Handle the store action: store a valid 5-card poker hand."""
+        return self._drive(self._store_action(player))
+
+    def is_game_over(self) -> bool:
+        """Check if the game is over."""
+        return self.locked or len(self.main_deck) == 0 and len(self.treasure_deck) == 0 and all(len(player.hand) == 0 for player in self.players)
+
+    def determine_winner(self) -> Player:
+        """Determine the winner of the game based on stored hands."""
+        best_scores = [max((self._strength(hand) >> 20 for hand in player.stored_hands), default=0) for player in self.players]
+
+        max_score = max(best_scores)
+        winners = [player for player, score in zip(self.players, best_scores) if score == max_score]
+
+        if len(winners) == 1:
+            return winners[0]
+        else:
+            # In case of a tie, randomly select a winner
+            return self.rng.choice(winners)
+
+    # Engine steps. Each yields the decisions it needs and returns its result.
+
+    def _run(self, max_turns: Optional[int], deck: Optional[Iterable[int]]) -> Steps:
+        self.setup(deck)
+
+        while not self.is_game_over() and (max_turns is None or self.turn < max_turns):
+            current_player = self.players[self.current_player_index]
+            self._notify('display_game_state', self)
+
+            action = yield PendingDecision(DecisionKind.ACTION, current_player, (current_player,))
+            if self.instrumentation:
+                success = yield from self._instrumented_action(current_player, action)
+            else:
+                success = yield from self._action(current_player, action)
+            if self.recorder:
+                self.recorder.turn(self.current_player_index, action, success)
+
+            self.current_player_index = (self.current_player_index + 1) % len(self.players)
+            self.turn += 1
+            self._check_lock()
+
+        self.winner = self.determine_winner()
+        if self.recorder:
+            self.recorder.end(self.players.index(self.winner))
+        self._notify('display_winner', self.winner)
+
+    def _check_lock(self):
+        """
+        End the game in the lock condition.
+
+        Once the main deck is empty, only two things bring the game closer to its end:
+        storing a hand, and a challenge winner taking cards from the treasure deck.
+        Swaps and draws from empty decks only move cards around. After ``LOCK_ROUNDS``
+        full rounds without either, every player stores the best set of hands they can
+        form (see ``endgame.solve``) and the game ends; cards that fit no hand are not
+        scored.
+        """
+        if self.main_deck:
+            return
+        progress = (len(self.treasure_deck), sum(len(player.stored_hands) for player in self.players))
+        if progress != self._progress:
+            self._progress = progress
+            self._quiet_turns = 0
+            return
+        self._quiet_turns += 1
+        if self._quiet_turns < LOCK_ROUNDS * len(self.players):
+            return
+
+        self._notify('display_message', "The game is locked: every player stores their best hands.")
+        for index, player in enumerate(self.players):
+            if self.instrumentation:
+                self.instrumentation.evaluations += comb(len(player.hand), 5)
+            hands, _ = solve(player.hand)
+            for hand in hands:
+                player.store_hand(hand)
+                if self.recorder:
+                    self.recorder.store(index, [card.uid for card in hand])
+        self.locked = True
+
+    def _strength(self, cards: List[Card]) -> int:
+        """Return the strength of a hand, looked up in ``evaluation_cache`` if set."""
+        if self.instrumentation:
+            self.instrumentation.evaluations += 1
+        cache = self.evaluation_cache
+        return cache.strength(cards) if cache is not None else PokerHand(cards).strength()
+
+    def _instrumented_action(self, player: Player, action: Action) -> Steps:
+        instrumentation = self.instrumentation
+        start = instrumentation.clock()
+        success = yield from self._action(player, action)
+        reason = ''
+        if not success:
+            # Failures explain themselves with a message, still buffered at this point.
+            reason = next((args[0] for method, args in reversed(self._events) if method == 'display_message'), '')
+        instrumentation.action(self, player, action, success, start, reason)
+        return success
+
+    def _action(self, player: Player, action: Action) -> Steps:
         if action == Action.DECK:
-            return self.handle_deck_action(player)
+            # Drawing needs no decisions.
+            return self._deck_action(player)
         elif action == Action.TREASURE:
-            return self.handle_treasure_action(player)
+            return (yield from self._treasure_action(player))
         elif action == Action.CHALLENGE:
-            return self.handle_challenge_action(player)
+            return (yield from self._challenge_action(player))
         elif action == Action.STORE:
-            return self.handle_store_action(player)
+            return (yield from self._store_action(player))
         return False
 
-    def handle_deck_action(self, player: Player) -> bool:
-        """Handle the deck action: draw a card from the main deck."""
+    def _deck_action(self, player: Player) -> bool:
         if len(player.hand) >= 13:
-            self.interface.display_message("You already have 13 cards. You can't draw more.")
+            self._notify('display_message', "You already have 13 cards. You can't draw more.")
             return False
-        
+
         card = self.main_deck.draw()
         if card:
             player.add_card(card)
+            if self.recorder:
+                self.recorder.draw(self.players.index(player), card.uid)
             return True
         else:
-            self.interface.display_message("The main deck is empty.")
+            self._notify('display_message', "The main deck is empty.")
             return False
 
-    def handle_treasure_action(self, player: Player) -> bool:
-        """Handle the treasure action: swap a card with the treasure deck."""
+    def _treasure_action(self, player: Player) -> Steps:
         if len(self.treasure_deck) == 0:
-            self.interface.display_message("The treasure deck is empty.")
+            self._notify('display_message', "The treasure deck is empty.")
             return False
 
-        player_card = self.interface.get_card_from_hand(player)
-        treasure_card = self.interface.get_card_from_treasure(self.treasure_deck)
+        player_card = yield PendingDecision(DecisionKind.CARD_FROM_HAND, player, (player,))
+        treasure_card = yield PendingDecision(DecisionKind.CARD_FROM_TREASURE, player, (self.treasure_deck,))
 
         player.remove_card(player_card)
         player.add_card(treasure_card)
         self.treasure_deck.remove(treasure_card)
         self.treasure_deck.append(player_card)
+        if self.recorder:
+            self.recorder.swap(self.players.index(player), player_card.uid, treasure_card.uid)
 
         # Replace the taken treasure card
-        if self.main_deck.cards:
+        if self.main_deck:
             new_treasure_card = self.main_deck.draw()
             self.treasure_deck.append(new_treasure_card)
+            if self.recorder:
+                self.recorder.refill(new_treasure_card.uid)
 
         return True
 
-    def handle_challenge_action(self, player: Player) -> bool:
-        """Handle the challenge action: challenge another player to a poker hand duel."""
+    def _challenge_action(self, player: Player) -> Steps:
+        if len(player.hand) < 3:
+            self._notify('display_message', "You need at least 3 cards to challenge.")
+            return False
+
         opponents = [p for p in self.players if p != player and len(p.hand) >= 3]
         if not opponents:
-            self.interface.display_message("No opponents have enough cards for a challenge.")
+            self._notify('display_message', "No opponents have enough cards for a challenge.")
             return False
 
-        opponent = self.interface.select_opponent(player, opponents)
-        num_cards = self.interface.get_challenge_hand_size(min(len(player.hand), len(opponent.hand), 5))
+        opponent = yield PendingDecision(DecisionKind.OPPONENT, player, (player, opponents))
+        num_cards = yield PendingDecision(DecisionKind.CHALLENGE_SIZE, player, (min(len(player.hand), len(opponent.hand), 5),))
 
-        challenger_hand = PokerHand(self.interface.select_cards(player, num_cards))
-        opponent_hand = PokerHand(self.interface.select_cards(opponent, num_cards))
+        challenger_hand = PokerHand((yield PendingDecision(DecisionKind.CARDS, player, (player, num_cards))))
+        opponent_hand = PokerHand((yield PendingDecision(DecisionKind.CARDS, opponent, (opponent, num_cards))))
 
-        challenger_rank, _ = challenger_hand.evaluate()
-        opponent_rank, _ = opponent_hand.evaluate()
+        challenger_rank = self._strength(challenger_hand.cards) >> 20
+        opponent_rank = self._strength(opponent_hand.cards) >> 20
 
         winner = player if challenger_rank > opponent_rank else opponent
-        self.interface.display_challenge_result(player, opponent, winner)
+        if self.recorder:
+            challenger_index, opponent_index = self.players.index(player), self.players.index(opponent)
+            self.recorder.reveal(challenger_index, [card.uid for card in challenger_hand.cards])
+            self.recorder.reveal(opponent_index, [card.uid for card in opponent_hand.cards])
+            self.recorder.challenge(challenger_index, opponent_index, challenger_rank, opponent_rank)
+        self._notify('display_challenge_result', player, opponent, winner)
 
         cards_to_draw = challenger_rank if winner == player else opponent_rank
-        self.draw_cards_after_challenge(winner, cards_to_draw)
+        yield from self._draw_cards_after_challenge(winner, cards_to_draw)
 
         return True
-    
-    def draw_cards_after_challenge(self, player: Player, num_cards: int):
-        """Allow the challenge winner to draw cards."""
+
+    def _draw_cards_after_challenge(self, player: Player, num_cards: int) -> Steps:
         for _ in range(num_cards):
             if len(player.hand) >= 13:
-                self.interface.display_message(f"{player.name} can't draw more cards (hand limit reached).")
+                self._notify('display_message', f"{player.name} can't draw more cards (hand limit reached).")
                 break
 
-            source = self.interface.choose_draw_source()
+            source = yield PendingDecision(DecisionKind.DRAW_SOURCE, player, ())
             if source == 'treasure' and self.treasure_deck:
-                card = self.treasure_deck.pop(0)
+                card = self.treasure_deck.popleft()
                 player.add_card(card)
-                if self.main_deck.cards:
-                    self.treasure_deck.append(self.main_deck.draw())
-            elif source == 'main' and self.main_deck.cards:
+                if self.recorder:
+                    self.recorder.take_treasure(self.players.index(player), card.uid)
+                if self.main_deck:
+                    refill = self.main_deck.draw()
+                    self.treasure_deck.append(refill)
+                    if self.recorder:
+                        self.recorder.refill(refill.uid)
+            elif source == 'main' and self.main_deck:
                 card = self.main_deck.draw()
                 player.add_card(card)
+                if self.recorder:
+                    self.recorder.draw(self.players.index(player), card.uid)
             else:
-                self.interface.display_message(f"No more cards available from the {source} deck.")
+                self._notify('display_message', f"No more cards available from the {source} deck.")
                 break
 
-    def handle_store_action(self, player: Player) -> bool:
-        """Handle the store action: store a valid 5-card poker hand."""
+    def _store_action(self, player: Player) -> Steps:
         if len(player.hand) < 5:
-            self.interface.display_message("You need at least 5 cards to store a hand.")
+            self._notify('display_message', "You need at least 5 cards to store a hand.")
             return False
 
-        selected_cards = self.interface.select_cards(player, 5)
-        hand = PokerHand(selected_cards)
-        
-        if hand.evaluate()[0] > PokerHand.HIGH_CARD:
+        selected_cards = yield PendingDecision(DecisionKind.CARDS, player, (player, 5))
+        if self._strength(selected_cards) >> 20 > PokerHand.HIGH_CARD:
             player.store_hand(selected_cards)
-            for card in selected_cards:
-                player.remove_card(card)
+            if self.recorder:
+                self.recorder.store(self.players.index(player), [card.uid for card in selected_cards])
             return True
         else:
-            self.interface.display_message("The selected hand is not a valid poker hand (at least a pair is required).")
+            self._notify('display_message', "The selected hand is not a valid poker hand (at least a pair is required).")
             return False
 
-    def is_game_over(self) -> bool:
-        """Check if the game is over."""
-        return len(self.main_deck.cards) == 0 and len(self.treasure_deck) == 0 and all(len(player.hand) == 0 for player in self.players)
+    # Drivers.
 
-    def determine_winner(self) -> Player:
-        """Determine the winner of the game based on stored hands."""
-        best_scores = []
-        for player in self.players:
-            if not player.stored_hands:
-                best_scores.append(0)
-            else:
-                best_hand = max(player.stored_hands, key=lambda hand: PokerHand(hand).evaluate()[0])
-                best_scores.append(PokerHand(best_hand).evaluate()[0])
-        
-        max_score = max(best_scores)
-        winners = [player for player, score in zip(self.players, best_scores) if score == max_score]
-        
-        if len(winners) == 1:
-            return winners[0]
+    def _notify(self, method: str, *args):
+        self._events.append((method, args))
+
+    def _advance(self, resume, value) -> Optional[PendingDecision]:
+        instrumentation = self.instrumentation
+        if instrumentation:
+            instrumentation.resume()
+        try:
+            decision = resume(value)
+        except StopIteration:
+            decision = None
+            self._engine = None
         else:
-            # In case of a tie, randomly select a winner
-            return random.choice(winners)
\ No newline at end of file
+            decision.events = self.drain_events()
+        self._pending = decision
+        if instrumentation:
+            instrumentation.suspend(decision is not None)
+        return decision
+
+    def _answer(self, decision: PendingDecision) -> Any:
+        return getattr(self.interface, decision.kind.value)(*decision.args)
+
+    def _deliver(self, events: List[Tuple[str, Tuple]]):
+        for method, args in events:
+            getattr(self.interface, method)(*args)
+
+    def _drive(self, steps: Steps) -> Any:
+        """Run engine steps to completion, answering every decision from the interface."""
+        instrumentation = self.instrumentation
+        try:
+            if instrumentation:
+                instrumentation.resume()
+            decision = next(steps)
+            while True:
+                if instrumentation:
+                    instrumentation.suspend(True)
+                self._deliver(self.drain_events())
+                answer = self._answer(decision)
+                if instrumentation:
+                    instrumentation.resume()
+                decision = steps.send(answer)
+        except StopIteration as stop:
+            if instrumentation:
+                instrumentation.suspend(False)
+            self._deliver(self.drain_events())
+            return stop.value
+
+    def _validate(self, decision: PendingDecision, answer: Any):
+        kind = decision.kind
+        player = decision.player
+        if kind is DecisionKind.ACTION:
+            valid = isinstance(answer, Action)
+        elif kind is DecisionKind.CARD_FROM_HAND:
+            valid = isinstance(answer, Card) and player.holds(answer)
+        elif kind is DecisionKind.CARD_FROM_TREASURE:
+            valid = isinstance(answer, Card) and answer in self.treasure_deck
+        elif kind is DecisionKind.OPPONENT:
+            valid = answer in decision.args[1]
+        elif kind is DecisionKind.CHALLENGE_SIZE:
+            valid = isinstance(answer, int) and 3 <= answer <= decision.args[0]
+        elif kind is DecisionKind.CARDS:
+            valid = (
+                isinstance(answer, list)
+                and len(answer) == decision.args[1]
+                and all(isinstance(card, Card) and player.holds(card) for card in answer)
+                and len(set(answer)) == len(answer)
+            )
+        else:
+            valid = answer in ('treasure', 'main')
+        if not valid:
+            raise ValueError(f"Invalid answer to {kind.name} for {player.name}: {answer!r}")
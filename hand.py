@@ -1,11 +1,20 @@
+from array import array
 from collections import Counter
-from typing import List, Tuple
-from physical import Card, Rank
+from itertools import combinations, combinations_with_replacement
+from math import comb
+from operator import attrgetter
+from typing import Dict, Iterator, List, Optional, Tuple
+from physical import Card
+from tables import load_tables, save_tables, table_path
 
 class PokerHand:
     """
     Represents a poker hand and provides methods for evaluating its rank.
 
+    Hands are scored with precomputed lookup tables: one indexed by the rank bitmask
+    of single-suit hands, and one per hand size indexed by the position of the hand's
+    rank multiset in the combinatorial number system.
+
     Attributes:
         cards (List[Card]): The cards in the poker hand (3-5 cards).
     """
@@ -25,7 +34,7 @@ class PokerHand:
     def __init__(self, cards: List[Card]):
         if not 3 <= len(cards) <= 5:
             raise ValueError("Poker hand must contain 3-5 cards")
-        self.cards = sorted(cards, key=lambda card: card.rank.value, reverse=True)
+        self.cards = sorted(cards, key=_VALUE, reverse=True)
 
     def evaluate(self) -> Tuple[int, List[int]]:
         """
@@ -35,97 +44,354 @@ class PokerHand:
             Tuple[int, List[int]]: A tuple containing the hand rank and a list of
             tie-breaking values (card ranks in order of importance).
         """
-        if len(self.cards) == 5 and self._is_royal_flush():
-            return (self.ROYAL_FLUSH, [])
-        
-        if self._is_straight_flush():
-            return (self.STRAIGHT_FLUSH, [self.cards[0].rank.value])
-        
-        if self._is_four_of_a_kind():
-            four_rank, kicker = self._get_four_of_a_kind_ranks()
-            return (self.FOUR_OF_A_KIND, [four_rank, kicker])
-        
-        if self._is_full_house():
-            three_rank, pair_rank = self._get_full_house_ranks()
-            return (self.FULL_HOUSE, [three_rank, pair_rank])
-        
-        if self._is_flush():
-            return (self.FLUSH, [card.rank.value for card in self.cards])
-        
-        if self._is_straight():
-            return (self.STRAIGHT, [self.cards[0].rank.value])
-        
-        if self._is_three_of_a_kind():
-            three_rank, kickers = self._get_three_of_a_kind_ranks()
-            return (self.THREE_OF_A_KIND, [three_rank] + kickers)
-        
-        if self._is_two_pair():
-            high_pair, low_pair, kicker = self._get_two_pair_ranks()
-            return (self.TWO_PAIR, [high_pair, low_pair, kicker])
-        
-        if self._is_pair():
-            pair_rank, kickers = self._get_pair_ranks()
-            return (self.PAIR, [pair_rank] + kickers)
-        
-        return (self.HIGH_CARD, [card.rank.value for card in self.cards])
-
-    def _rank_counts(self) -> Counter:
-        return Counter(card.rank.value for card in self.cards)
-
-    def _is_flush(self) -> bool:
-        return len(set(card.suit for card in self.cards)) == 1
-
-    def _is_straight(self) -> bool:
-        values = sorted(set(card.rank.value for card in self.cards))
-        return len(values) == len(self.cards) and values[-1] - values[0] == len(values) - 1
-
-    def _is_royal_flush(self) -> bool:
-        return self._is_flush() and set(card.rank for card in self.cards) == {Rank.TEN, Rank.JACK, Rank.QUEEN, Rank.KING, Rank.ACE}
-
-    def _is_straight_flush(self) -> bool:
-        return self._is_flush() and self._is_straight()
-
-    def _is_four_of_a_kind(self) -> bool:
-        return 4 in self._rank_counts().values()
-
-    def _is_full_house(self) -> bool:
-        return set(self._rank_counts().values()) == {2, 3}
-
-    def _is_three_of_a_kind(self) -> bool:
-        return 3 in self._rank_counts().values()
-
-    def _is_two_pair(self) -> bool:
-        return list(self._rank_counts().values()).count(2) == 2
-
-    def _is_pair(self) -> bool:
-        return 2 in self._rank_counts().values()
-
-    def _get_four_of_a_kind_ranks(self) -> Tuple[int, int]:
-        ranks = self._rank_counts()
-        four_rank = next(rank for rank, count in ranks.items() if count == 4)
-        kicker = next(rank for rank, count in ranks.items() if count == 1)
-        return four_rank, kicker
-
-    def _get_full_house_ranks(self) -> Tuple[int, int]:
-        ranks = self._rank_counts()
-        three_rank = next(rank for rank, count in ranks.items() if count == 3)
-        pair_rank = next(rank for rank, count in ranks.items() if count == 2)
-        return three_rank, pair_rank
-
-    def _get_three_of_a_kind_ranks(self) -> Tuple[int, List[int]]:
-        ranks = self._rank_counts()
-        three_rank = next(rank for rank, count in ranks.items() if count == 3)
-        kickers = sorted([rank for rank, count in ranks.items() if count == 1], reverse=True)
-        return three_rank, kickers
-
-    def _get_two_pair_ranks(self) -> Tuple[int, int, int]:
-        ranks = self._rank_counts()
-        pairs = sorted([rank for rank, count in ranks.items() if count == 2], reverse=True)
-        kicker = next(rank for rank, count in ranks.items() if count == 1)
-        return pairs[0], pairs[1], kicker
-
-    def _get_pair_ranks(self) -> Tuple[int, List[int]]:
-        ranks = self._rank_counts()
-        pair_rank = next(rank for rank, count in ranks.items() if count == 2)
-        kickers = sorted([rank for rank, count in ranks.items() if count == 1], reverse=True)
-        return pair_rank, kickers
\ No newline at end of file
+        return PokerHand.unpack(self.strength(), len(self.cards))
+
+    def strength(self) -> int:
+        """
+        Return the hand rank and tie-breaking values packed into a single integer.
+
+        Strengths of hands with the same number of cards order exactly like the
+        tuples returned by ``evaluate``; ``strength >> 20`` is the hand rank.
+        """
+        return _strength(self.cards)
+
+    @staticmethod
+    def unpack(strength: int, size: int) -> Tuple[int, List[int]]:
+        """Decode the ``strength`` of a ``size``-card hand into the result of ``evaluate``."""
+        category = strength >> 20
+        return (category, _unpack(strength, _TIEBREAK_LENGTHS[size][category]))
+
+    @classmethod
+    def best(cls, cards: List[Card], size: int, rank_counts: Optional[List[int]] = None, suit_counts: Optional[List[int]] = None) -> Optional[Tuple[List[Card], Tuple[int, List[int]]]]:
+        """
+        Find the strongest ``size``-card poker hand that can be formed from ``cards``.
+
+        Cards of equal rank are interchangeable outside of flushes, so rather than
+        enumerating card subsets the search enumerates the rank multisets allowed by
+        the rank histogram, scoring each one straight from the lookup tables. Flushes
+        are only searched in suits holding at least ``size`` cards, and the rank
+        search is skipped when no rank multiset can beat the best flush. Callers that
+        keep the histograms up to date (like ``Player``) pass them in, so the search
+        never recounts the cards.
+
+        Args:
+            cards (List[Card]): The cards to choose from (e.g. a player's hand).
+            size (int): The number of cards in the hand (3-5).
+            rank_counts (Optional[List[int]]): The number of cards of each value in
+                ``cards``, indexed by value, if already known (e.g. ``Player.rank_counts``).
+            suit_counts (Optional[List[int]]): The number of cards of each suit (0-3),
+                given together with ``rank_counts``.
+
+        Returns:
+            Optional[Tuple[List[Card], Tuple[int, List[int]]]]: The chosen cards and
+            their evaluation, or None if there are fewer than ``size`` cards.
+        """
+        if not 3 <= size <= 5:
+            raise ValueError("Poker hand must contain 3-5 cards")
+        if len(cards) < size:
+            return None
+        if rank_counts is None:
+            rank_counts, suit_counts = _histograms(cards)
+
+        best_strength = -1
+        best_cards = None
+        flush_suits = [
+            sorted((card for card in cards if card.code // 13 == suit), key=_VALUE, reverse=True)
+            for suit, held in enumerate(suit_counts) if held >= size
+        ]
+        if len(flush_suits) > 1:
+            # Among equally strong flushes, prefer the suit holding the highest card
+            # (the first such card in ``cards`` on a tie).
+            flush_suits.sort(key=lambda suited: (-suited[0].value, cards.index(suited[0])))
+        for suited in flush_suits:
+            for candidate in _flush_candidates(suited, size):
+                strength = _strength(candidate)
+                if strength > best_strength:
+                    best_strength, best_cards = strength, candidate
+
+        if best_strength >> 20 <= _rank_search_bound(rank_counts, size):
+            values = [value for value in range(2, 15) if rank_counts[value]]
+            counts = [rank_counts[value] for value in values]
+            table = _RANK_TABLES[size]
+            best_multiset = None
+            chosen = []
+
+            def search(start: int, index: int):
+                nonlocal best_strength, best_multiset
+                slot = len(chosen)
+                if slot == size:
+                    strength = table[index]
+                    if strength > best_strength:
+                        best_strength, best_multiset = strength, list(chosen)
+                    return
+                for i in range(start, len(values)):
+                    value = values[i]
+                    offset = index
+                    for copies in range(min(counts[i], size - slot)):
+                        offset += _MULTISET_INDEX[slot + copies][value]
+                        chosen.append(value)
+                        search(i + 1, offset)
+                    del chosen[slot:]
+
+            search(0, 0)
+            if best_multiset is not None:
+                taken = Counter(best_multiset)
+                best_cards = []
+                for card in cards:
+                    if taken[card.value]:
+                        taken[card.value] -= 1
+                        best_cards.append(card)
+
+        hand = cls(best_cards)
+        return (hand.cards, hand.evaluate())
+
+    @classmethod
+    def best_subsets(cls, cards: List[Card]) -> Dict[int, Tuple[List[Card], Tuple[int, List[int]]]]:
+        """
+        Find the strongest hand of every size from 3 to 5 that ``cards`` can form.
+
+        Returns:
+            Dict[int, Tuple[List[Card], Tuple[int, List[int]]]]: The result of ``best``
+            keyed by hand size, for each size no larger than the number of cards.
+        """
+        rank_counts, suit_counts = _histograms(cards)
+        return {size: cls.best(cards, size, rank_counts, suit_counts) for size in range(3, min(len(cards), 5) + 1)}
+
+    @staticmethod
+    def evaluate_many(cards_array) -> Tuple['numpy.ndarray', 'numpy.ndarray']:
+        """
+        Evaluate a batch of equally sized hands with vectorized NumPy operations.
+
+        Requires NumPy. Each hand is classified from its rank histogram, rank bitmask
+        and suit comparison; no ``PokerHand`` objects are created.
+
+        Args:
+            cards_array: An ``(N, k)`` integer array of card codes (``Card.code``),
+                with 3 <= k <= 5.
+
+        Returns:
+            Tuple[numpy.ndarray, numpy.ndarray]: The hand rank of each hand (uint8)
+            and its packed tie-breaking values (int32), such that
+            ``category << 20 | score`` equals ``PokerHand(cards).strength()``.
+        """
+        import numpy as np
+
+        codes = np.asarray(cards_array, dtype=np.int64)
+        if codes.ndim != 2 or not 3 <= codes.shape[1] <= 5:
+            raise ValueError("Expected an (N, k) array of card codes with 3 <= k <= 5")
+        count, size = codes.shape
+        ranks = codes % 13
+        suits = codes // 13
+
+        histogram = np.bincount((np.arange(count)[:, None] * 13 + ranks).ravel(), minlength=count * 13).reshape(count, 13)
+        max_count = histogram.max(axis=1)
+        pairs = (histogram == 2).sum(axis=1)
+        flush = (suits == suits[:, :1]).all(axis=1)
+        rank_mask = np.bitwise_or.reduce(1 << ranks, axis=1)
+        low = ranks.min(axis=1)
+        high = ranks.max(axis=1)
+        straight = (max_count == 1) & (rank_mask == ((1 << size) - 1) << low)
+
+        categories = np.select(
+            [
+                flush & straight & (size == 5) & (high == 12),
+                flush & straight,
+                max_count == 4,
+                (max_count == 3) & (pairs == 1) & (size == 5),
+                flush,
+                straight,
+                max_count == 3,
+                pairs == 2,
+                pairs >= 1,
+            ],
+            [
+                PokerHand.ROYAL_FLUSH,
+                PokerHand.STRAIGHT_FLUSH,
+                PokerHand.FOUR_OF_A_KIND,
+                PokerHand.FULL_HOUSE,
+                PokerHand.FLUSH,
+                PokerHand.STRAIGHT,
+                PokerHand.THREE_OF_A_KIND,
+                PokerHand.TWO_PAIR,
+                PokerHand.PAIR,
+            ],
+            PokerHand.HIGH_CARD,
+        ).astype(np.uint8)
+
+        shifts = np.array([16, 12, 8, 4, 0][:size], dtype=np.int64)
+        # Distinct ranks ordered by multiplicity, then value; empty slots pack as 0.
+        keys = np.where(histogram > 0, histogram * 16 + np.arange(2, 15), 0)
+        grouped = ((-np.sort(-keys, axis=1)[:, :size] & 0xF) << shifts).sum(axis=1)
+        by_value = ((-np.sort(-(ranks + 2), axis=1)) << shifts).sum(axis=1)
+        top = (high + 2) << 16
+
+        scores = np.where(
+            (categories == PokerHand.STRAIGHT) | (categories == PokerHand.STRAIGHT_FLUSH), top,
+            np.where(
+                (categories == PokerHand.FLUSH) | (categories == PokerHand.HIGH_CARD), by_value,
+                np.where(categories == PokerHand.ROYAL_FLUSH, 0, grouped),
+            ),
+        ).astype(np.int32)
+        return categories, scores
+
+_VALUE = attrgetter('value')
+
+def _classify(values: Tuple[int, ...], flush: bool) -> Tuple[int, List[int]]:
+    """Rank a hand from its card values (highest first) and whether it is single-suited."""
+    counts = Counter(values)
+    straight = len(counts) == len(values) and values[0] - values[-1] == len(values) - 1
+
+    if flush and straight and len(values) == 5 and values[0] == 14:
+        return (PokerHand.ROYAL_FLUSH, [])
+    if flush and straight:
+        return (PokerHand.STRAIGHT_FLUSH, [values[0]])
+
+    # Ranks ordered by multiplicity, then by value: [four, kicker], [three, pair],
+    # [high pair, low pair, kicker], ...
+    grouped = [rank for rank, _ in sorted(counts.items(), key=lambda item: (item[1], item[0]), reverse=True)]
+    multiplicities = list(counts.values())
+
+    if 4 in multiplicities:
+        return (PokerHand.FOUR_OF_A_KIND, grouped)
+    if set(multiplicities) == {2, 3}:
+        return (PokerHand.FULL_HOUSE, grouped)
+    if flush:
+        return (PokerHand.FLUSH, list(values))
+    if straight:
+        return (PokerHand.STRAIGHT, [values[0]])
+    if 3 in multiplicities:
+        return (PokerHand.THREE_OF_A_KIND, grouped)
+    if multiplicities.count(2) == 2:
+        return (PokerHand.TWO_PAIR, grouped)
+    if 2 in multiplicities:
+        return (PokerHand.PAIR, grouped)
+    return (PokerHand.HIGH_CARD, list(values))
+
+def _pack(category: int, tiebreakers: List[int]) -> int:
+    strength = category << 20
+    for i, value in enumerate(tiebreakers):
+        strength |= value << (16 - 4 * i)
+    return strength
+
+def _unpack(strength: int, length: int) -> List[int]:
+    return [(strength >> (16 - 4 * i)) & 0xF for i in range(length)]
+
+def _strength(cards: List[Card]) -> int:
+    """Look up the strength of 3-5 cards sorted by value, highest first."""
+    index = 0
+    rank_mask = 0
+    suit = cards[0].suit
+    flush = True
+    for position, card in enumerate(reversed(cards)):
+        value = card.value
+        index += _MULTISET_INDEX[position][value]
+        rank_mask |= 1 << value
+        if card.suit is not suit:
+            flush = False
+
+    if flush:
+        if rank_mask.bit_count() == len(cards):
+            return _FLUSH_TABLE[rank_mask]
+        # Repeated ranks within one suit only happen with several decks in play.
+        return _pack(*_classify(tuple(card.value for card in cards), True))
+    return _RANK_TABLES[len(cards)][index]
+
+def _flush_candidates(suited: List[Card], size: int):
+    """Yield the best plain flush and the highest straight flush among same-suit cards."""
+    yield suited[:size]
+    run = []
+    for card in suited:
+        if run and card.value == run[-1].value:
+            continue
+        if run and card.value != run[-1].value - 1:
+            run = []
+        run.append(card)
+        if len(run) == size:
+            yield run
+            return
+
+def _histograms(cards: List[Card]) -> Tuple[List[int], List[int]]:
+    """Return the number of ``cards`` of each value (indexed by value) and of each suit."""
+    rank_counts = [0] * 15
+    suit_counts = [0] * 4
+    for card in cards:
+        rank_counts[card.value] += 1
+        suit_counts[card.code // 13] += 1
+    return rank_counts, suit_counts
+
+def _rank_search_bound(rank_counts: List[int], size: int) -> int:
+    """Return the highest hand rank a non-flush hand can reach given the rank histogram."""
+    counts = sorted((count for count in rank_counts if count), reverse=True)
+    if size >= 4 and counts[0] >= 4 and (size == 4 or len(counts) > 1):
+        return PokerHand.FOUR_OF_A_KIND
+    if size == 5 and counts[0] >= 3 and len(counts) > 1 and counts[1] >= 2:
+        return PokerHand.FULL_HOUSE
+    return PokerHand.STRAIGHT
+
+def rank_classes(size: int) -> Iterator[Tuple[Tuple[int, ...], int, Optional[int]]]:
+    """
+    Yield every rank multiset a ``size``-card hand can have, with its strengths.
+
+    Yields:
+        Tuple[Tuple[int, ...], int, Optional[int]]: The card values in ascending
+        order, the strength of the hand when not single-suited, and the strength
+        when single-suited (None if the values repeat).
+    """
+    table = _RANK_TABLES[size]
+    for ascending in combinations_with_replacement(range(2, 15), size):
+        index = sum(_MULTISET_INDEX[i][value] for i, value in enumerate(ascending))
+        distinct = len(set(ascending)) == size
+        flush = _FLUSH_TABLE[sum(1 << value for value in ascending)] if distinct else None
+        yield ascending, table[index], flush
+
+# _MULTISET_INDEX[i][value] is the contribution of the i-th lowest card to the index of
+# a rank multiset: sum(comb(rank_i + i, i + 1)) over ranks 0-12 in ascending order.
+_MULTISET_INDEX = [[comb(value - 2 + i, i + 1) if value >= 2 else 0 for value in range(15)] for i in range(5)]
+_FLUSH_TABLE = array('l', bytes(array('l').itemsize << 15))
+_RANK_TABLES = {}
+_TIEBREAK_LENGTHS = {}
+
+def _build_tables():
+    for size in (3, 4, 5):
+        table = array('l', bytes(array('l').itemsize * comb(12 + size, size)))
+        lengths = {}
+        for ascending in combinations_with_replacement(range(2, 15), size):
+            values = ascending[::-1]
+            index = sum(_MULTISET_INDEX[i][value] for i, value in enumerate(ascending))
+            category, tiebreakers = _classify(values, False)
+            table[index] = _pack(category, tiebreakers)
+            lengths[category] = len(tiebreakers)
+
+        for ascending in combinations(range(2, 15), size):
+            values = ascending[::-1]
+            category, tiebreakers = _classify(values, True)
+            _FLUSH_TABLE[sum(1 << value for value in values)] = _pack(category, tiebreakers)
+            lengths[category] = len(tiebreakers)
+
+        _RANK_TABLES[size] = table
+        _TIEBREAK_LENGTHS[size] = [lengths.get(category, 0) for category in range(PokerHand.ROYAL_FLUSH + 1)]
+
+def _load_tables():
+    """
+    Map the lookup tables from the on-disk table file, building and saving them first
+    if there is no valid file. Mapped tables are shared by every process using them;
+    changing how they are built needs a new ``tables.VERSION``.
+    """
+    global _FLUSH_TABLE
+    path = table_path('evaluator')
+    categories = PokerHand.ROYAL_FLUSH + 1
+    expected = {'flush': len(_FLUSH_TABLE), 'tiebreak': 3 * categories}
+    expected.update((f'rank{size}', comb(12 + size, size)) for size in (3, 4, 5))
+    tables = load_tables(path, expected)
+    if tables is None:
+        _build_tables()
+        tables = {'flush': _FLUSH_TABLE, 'tiebreak': [length for size in (3, 4, 5) for length in _TIEBREAK_LENGTHS[size]]}
+        tables.update((f'rank{size}', _RANK_TABLES[size]) for size in (3, 4, 5))
+        save_tables(path, tables)
+        return
+    _FLUSH_TABLE = tables['flush']
+    for i, size in enumerate((3, 4, 5)):
+        _RANK_TABLES[size] = tables[f'rank{size}']
+        _TIEBREAK_LENGTHS[size] = list(tables['tiebreak'][i * categories:(i + 1) * categories])
+
+_load_tables()
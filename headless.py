@@ -0,0 +1,163 @@
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+import random
+import time
+from game import Game, Action
+from player import Player
+from physical import Card
+from ui import UserInterface
+from policy import Policy, GreedyPolicy
+
+class HeadlessInterface(UserInterface):
+    """
+    User interface implementation that performs no I/O.
+
+    Every decision is delegated to the policy of the player making it, and every
+    display call is a no-op, so games run without printing or formatting anything.
+
+    Attributes:
+        policies (Dict[str, Policy]): The policy of each player, keyed by player name.
+        game (Game): The game being played; set by ``display_game_state`` or by the caller.
+        action_counts (Counter): The number of times each action was chosen.
+    """
+
+    def __init__(self, policies: Dict[str, Policy], game: Optional[Game] = None):
+        self.policies = policies
+        self.game = game
+        self.action_counts = Counter()
+        self._drawing_player: Optional[Player] = None
+        self._selected: Dict[str, List[Card]] = {}
+
+    def display_game_state(self, game: Game):
+        self.game = game
+
+    def get_player_action(self, player: Player) -> Action:
+        action = self.policies[player.name].choose_action(self.game, player)
+        self.action_counts[action] += 1
+        return action
+
+    def display_challenge_result(self, challenger: Player, opponent: Player, winner: Player):
+        # The winner is asked for draw sources next, without being named.
+        self._drawing_player = winner
+        for policy in self.policies.values():
+            policy.observe_reveal(self.game, challenger, self._selected[challenger.name])
+            policy.observe_reveal(self.game, opponent, self._selected[opponent.name])
+
+    def display_winner(self, winner: Player):
+        pass
+
+    def display_message(self, message: str):
+        pass
+
+    def get_card_from_hand(self, player: Player) -> Card:
+        return self.policies[player.name].choose_card_from_hand(self.game, player)
+
+    def get_card_from_treasure(self, treasure_deck: List[Card]) -> Card:
+        player = self.game.players[self.game.current_player_index]
+        return self.policies[player.name].choose_card_from_treasure(self.game, player)
+
+    def select_opponent(self, player: Player, opponents: List[Player]) -> Player:
+        return self.policies[player.name].choose_opponent(self.game, player, opponents)
+
+    def get_challenge_hand_size(self, max_size: int) -> int:
+        player = self.game.players[self.game.current_player_index]
+        return self.policies[player.name].choose_challenge_size(self.game, player, max_size)
+
+    def select_cards(self, player: Player, num_cards: int) -> List[Card]:
+        cards = self.policies[player.name].choose_cards(self.game, player, num_cards)
+        self._selected[player.name] = cards
+        return cards
+
+    def choose_draw_source(self) -> str:
+        player = self._drawing_player
+        return self.policies[player.name].choose_draw_source(self.game, player)
+
+class SimulationResult:
+    """
+    Summary of a batch of headless games.
+
+    Attributes:
+        games (int): The number of games played.
+        wins (Counter): The number of games won by each player name.
+        turns (int): The total number of turns played across all games.
+        truncated (int): The number of games stopped by the turn limit.
+        elapsed (float): The wall-clock time taken, in seconds.
+    """
+
+    def __init__(self):
+        self.games = 0
+        self.wins = Counter()
+        self.turns = 0
+        self.truncated = 0
+        self.elapsed = 0.0
+
+    @property
+    def games_per_second(self) -> float:
+        return self.games / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        return f"{self.games} games in {self.elapsed:.2f}s ({self.games_per_second:.1f} games/s)"
+
+PolicyFactory = Callable[[random.Random], Policy]
+
+def game_seed(seed: int, index: int) -> int:
+    """Return the seed of the ``index``-th game of a run seeded with ``seed``."""
+    return random.Random(f"{seed}/{index}").getrandbits(64)
+
+def play_game(seed: int, policies: Sequence[PolicyFactory], max_turns: int, deck: Optional[Iterable[int]] = None, recorder=None) -> Game:
+    """
+    Play one headless game and return it in its final state.
+
+    The deal, tie-breaks and every policy draw from generators derived from
+    ``seed`` alone, so a game can be replayed in any process. ``deck`` replaces
+    the seeded deal (see ``Game.setup``), and ``recorder`` is attached to the game
+    before it starts (see ``Game.add_recorder``).
+    """
+    rng = random.Random(seed)
+    names = [f"Player {seat + 1}" for seat in range(len(policies))]
+    interface = HeadlessInterface({name: factory(random.Random(rng.getrandbits(64))) for name, factory in zip(names, policies)})
+    game = Game(names, interface, rng=random.Random(rng.getrandbits(64)))
+    interface.game = game
+    if recorder is not None:
+        game.add_recorder(recorder)
+    game.play(max_turns=max_turns, deck=deck)
+    return game
+
+def simulate(
+    n_games: int,
+    seed: Optional[int] = None,
+    policies: Sequence[PolicyFactory] = (GreedyPolicy, GreedyPolicy),
+    max_turns: int = 500,
+    deals: Optional[Sequence[Iterable[int]]] = None,
+) -> SimulationResult:
+    """
+    Play complete games between automated players without any I/O.
+
+    Args:
+        n_games (int): The number of games to play.
+        seed (Optional[int]): Seed for the deals, tie-breaks and policy choices; the
+            same seed replays the same games.
+        policies (Sequence[PolicyFactory]): One policy factory per seat, called with
+            a random number generator (a ``Policy`` subclass works directly).
+        max_turns (int): The turn limit after which a game is scored as it stands.
+        deals (Optional[Sequence[Iterable[int]]]): The deck of each game, e.g. from
+            ``deals.shuffled_decks(n_games, seed)``; replaces the seeded deals, so
+            variants can be compared on the same deals.
+
+    Returns:
+        SimulationResult: The win counts, turn counts and throughput of the batch.
+    """
+    if seed is None:
+        seed = random.getrandbits(64)
+    result = SimulationResult()
+
+    start = time.perf_counter()
+    for index in range(n_games):
+        game = play_game(game_seed(seed, index), policies, max_turns, deals[index] if deals is not None else None)
+        result.games += 1
+        result.wins[game.winner.name] += 1
+        result.turns += game.turn
+        if not game.is_game_over():
+            result.truncated += 1
+    result.elapsed = time.perf_counter() - start
+    return result
@@ -1,6 +1,44 @@
-from physical import Card, Deck
-from player import Player
-from game import Game, Action
-from ui import UserInterface
-from hand import PokerHand
-from cli import CLIInterface
\ No newline at end of file
+"""
+The package's public names in one place.
+
+``from imports import Game`` imports only the modules ``Game`` needs: every name
+is resolved from its module on first access (PEP 562), so a headless worker never
+loads the CLI, the search or the analytics modules unless it uses them.
+"""
+from importlib import import_module
+
+_EXPORTS = {
+    'physical': ('Card', 'Deck'),
+    'player': ('Player',),
+    'game': ('Game', 'Action', 'DecisionKind', 'PendingDecision', 'Recorder'),
+    'ui': ('UserInterface',),
+    'hand': ('PokerHand',),
+    'cli': ('CLIInterface',),
+    'policy': ('Policy', 'RandomPolicy', 'GreedyPolicy'),
+    'headless': ('HeadlessInterface', 'simulate'),
+    'tournament': ('run_tournament',),
+    'state': ('GameState',),
+    'mcts': ('MCTSPolicy',),
+    'odds': ('ChallengeOdds', 'challenge_odds', 'conditional_odds', 'win_probability'),
+    'eventlog': ('EventLog', 'EventLogReader'),
+    'instrument': ('Instrumentation', 'Profiler'),
+    'endgame': ('solve',),
+    'evalcache': ('EvaluationCache',),
+    'tracker': ('CardTracker', 'ObserverModel'),
+    'pipeline': ('GameStats', 'play_stream', 'run'),
+}
+
+_MODULES = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = list(_MODULES)
+
+def __getattr__(name: str):
+    module = _MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
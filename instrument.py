@@ -0,0 +1,221 @@
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional
+import sys
+import time
+from game import Action
+from hand import PokerHand
+
+# Histogram bucket i counts durations d with d.bit_length() == i, i.e. 2**(i-1) <= d < 2**i ns.
+BUCKETS = 64
+
+ActionHook = Callable[['Game', 'Player', Action, bool, int], None]
+
+class ActionStats:
+    """
+    Counters and timings of one action type.
+
+    Attributes:
+        calls (int): The number of times the action was played.
+        successes (int): The number of times it succeeded.
+        failures (Counter): The number of failures, by the message the game gave (or '').
+        total_ns (int): The total wall time of the action, including decisions.
+        histogram (List[int]): The number of calls per power-of-two wall-time bucket.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.successes = 0
+        self.failures = Counter()
+        self.total_ns = 0
+        self.histogram = [0] * BUCKETS
+
+    def percentile(self, fraction: float) -> int:
+        """Return an upper bound of the ``fraction`` quantile of the wall time, in ns."""
+        remaining = fraction * self.calls
+        for bucket, count in enumerate(self.histogram):
+            remaining -= count
+            if remaining <= 0 and count:
+                return 1 << bucket
+        return 0
+
+    def to_dict(self) -> Dict:
+        return {
+            'calls': self.calls,
+            'successes': self.successes,
+            'failures': dict(self.failures),
+            'total_ns': self.total_ns,
+            'p50_ns': self.percentile(0.5),
+            'p99_ns': self.percentile(0.99),
+            'histogram': {1 << bucket: count for bucket, count in enumerate(self.histogram) if count},
+        }
+
+class Instrumentation:
+    """
+    Opt-in measurements of a game, enabled by setting ``Game.instrumentation``.
+
+    The game reports each action it plays, the evaluations it runs, and when it
+    starts and stops running; the time between stopping and starting again is time
+    spent waiting for (or in) the interface. A game without instrumentation only
+    pays for a ``None`` check per decision and per action.
+
+    Attributes:
+        actions (Dict[Action, ActionStats]): The statistics of each action.
+        evaluations (int): The number of hands the engine evaluated (challenges,
+            stores and the final scoring).
+        decisions (int): The number of decisions the engine waited on.
+        engine_ns (int): The time spent running the engine.
+        interface_ns (int): The time spent between decisions, in the interface.
+        on_action (Optional[ActionHook]): Called after every action with the game,
+            player, action, success and wall time in ns.
+        clock (Callable[[], int]): The clock, in ns.
+    """
+
+    def __init__(self, on_action: Optional[ActionHook] = None, clock: Callable[[], int] = time.perf_counter_ns):
+        self.actions: Dict[Action, ActionStats] = {action: ActionStats() for action in Action}
+        self.evaluations = 0
+        self.decisions = 0
+        self.engine_ns = 0
+        self.interface_ns = 0
+        self.on_action = on_action
+        self.clock = clock
+        self._resumed = 0
+        self._suspended: Optional[int] = None
+
+    # Called by Game.
+
+    def resume(self):
+        now = self.clock()
+        if self._suspended is not None:
+            self.interface_ns += now - self._suspended
+        self._resumed = now
+
+    def suspend(self, waiting: bool):
+        """Stop the engine clock; ``waiting`` is False once there is nothing left to wait for."""
+        now = self.clock()
+        self.engine_ns += now - self._resumed
+        self._suspended = now if waiting else None
+        self.decisions += waiting
+
+    def action(self, game, player, action: Action, success: bool, start: int, reason: str = ''):
+        elapsed = self.clock() - start
+        stats = self.actions.get(action)
+        if stats is None:
+            return
+        stats.calls += 1
+        stats.total_ns += elapsed
+        stats.histogram[min(elapsed.bit_length(), BUCKETS - 1)] += 1
+        if success:
+            stats.successes += 1
+        else:
+            stats.failures[reason] += 1
+        if self.on_action:
+            self.on_action(game, player, action, success, elapsed)
+
+    def report(self) -> Dict:
+        """Return the measurements as JSON-ready data."""
+        return {
+            'actions': {action.name: stats.to_dict() for action, stats in self.actions.items()},
+            'evaluations': self.evaluations,
+            'decisions': self.decisions,
+            'engine_ns': self.engine_ns,
+            'interface_ns': self.interface_ns,
+        }
+
+def _evaluator_functions() -> List[Callable]:
+    return [PokerHand.evaluate, PokerHand.strength, PokerHand.best, PokerHand.best_subsets]
+
+class Profiler:
+    """
+    Counts the calls to, and the time spent in, a set of functions (the hand
+    evaluator by default), wherever they are called from.
+
+    Uses ``sys.monitoring`` local events on Python 3.12+, which only touch the
+    monitored functions, and falls back to ``sys.setprofile`` (current thread
+    only, much slower, and chained to any profile function already set) on older
+    versions. Use as a context manager.
+
+    Attributes:
+        calls (Counter): The number of calls, by qualified function name.
+        time_ns (Counter): The inclusive time spent, by qualified function name.
+    """
+
+    def __init__(self, functions: Optional[Iterable[Callable]] = None):
+        functions = _evaluator_functions() if functions is None else functions
+        self._codes = {function.__code__: function.__qualname__ for function in functions}
+        self.calls = Counter()
+        self.time_ns = Counter()
+        self._started: Dict[object, List[int]] = {code: [] for code in self._codes}
+        self._tool: Optional[int] = None
+        self._profiling = False
+        self._previous: Optional[Callable] = None
+
+    def __enter__(self) -> 'Profiler':
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _enter(self, code):
+        self.calls[self._codes[code]] += 1
+        self._started[code].append(time.perf_counter_ns())
+
+    def _leave(self, code):
+        started = self._started[code]
+        if started:
+            self.time_ns[self._codes[code]] += time.perf_counter_ns() - started.pop()
+
+    def start(self):
+        """
+        Start counting.
+
+        Raises:
+            RuntimeError: If another tool holds the ``sys.monitoring`` profiler ID.
+        """
+        if hasattr(sys, 'monitoring'):
+            monitoring = sys.monitoring
+            tool = monitoring.PROFILER_ID
+            holder = monitoring.get_tool(tool)
+            if holder is not None:
+                raise RuntimeError(f"The sys.monitoring profiler ID is already used by {holder!r}")
+            monitoring.use_tool_id(tool, 'dragons-hoard')
+            self._tool = tool
+            events = monitoring.events
+            monitoring.register_callback(tool, events.PY_START, lambda code, offset: self._enter(code))
+            monitoring.register_callback(tool, events.PY_RETURN, lambda code, offset, value: self._leave(code))
+            # Exits by exception; PY_UNWIND can only be enabled globally, so filter here.
+            monitoring.register_callback(tool, events.PY_UNWIND, lambda code, offset, exception: self._leave(code) if code in self._codes else None)
+            monitoring.set_events(tool, events.PY_UNWIND)
+            for code in self._codes:
+                monitoring.set_local_events(tool, code, events.PY_START | events.PY_RETURN)
+        else:
+            previous = self._previous = sys.getprofile()
+
+            def profile(frame, event, arg):
+                code = frame.f_code
+                if code in self._codes:
+                    if event == 'call':
+                        self._enter(code)
+                    elif event == 'return':
+                        # Also sent, with arg None, when the function exits by exception.
+                        self._leave(code)
+                if previous is not None:
+                    previous(frame, event, arg)
+            sys.setprofile(profile)
+            self._profiling = True
+
+    def stop(self):
+        if self._tool is not None:
+            monitoring = sys.monitoring
+            events = monitoring.events
+            monitoring.set_events(self._tool, events.NO_EVENTS)
+            for code in self._codes:
+                monitoring.set_local_events(self._tool, code, events.NO_EVENTS)
+            for event in (events.PY_START, events.PY_RETURN, events.PY_UNWIND):
+                monitoring.register_callback(self._tool, event, None)
+            monitoring.free_tool_id(self._tool)
+            self._tool = None
+        elif self._profiling:
+            sys.setprofile(self._previous)
+            self._previous = None
+            self._profiling = False
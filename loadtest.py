@@ -0,0 +1,161 @@
+"""
+Load-test client for ``server.py``.
+
+Plays ``--tables`` concurrent games with random bots and reports decisions/second
+and the decision latency: the time from one answer at a table to the next
+decision at the same table, i.e. the server's turnaround. ``--idle`` extra
+clients sit in half-empty tables for the whole run, and ``--spawn`` starts a
+local server first.
+"""
+from typing import List, Optional, Tuple
+import argparse
+import asyncio
+import json
+import random
+import socket
+import subprocess
+import sys
+import time
+
+def _answer(message: dict, rng: random.Random):
+    kind, args, hand = message['kind'], message['args'], message['hand']
+    if kind == 'get_player_action':
+        return rng.choice(message['actions'] or ['D'])
+    if kind == 'get_card_from_hand':
+        return rng.choice(hand)
+    if kind == 'get_card_from_treasure':
+        return rng.choice(args[0])
+    if kind == 'select_opponent':
+        return rng.choice(args[1])
+    if kind == 'get_challenge_hand_size':
+        return rng.randint(3, args[0])
+    if kind == 'select_cards':
+        return rng.sample(hand, args[1])
+    return rng.choice(['treasure', 'main'])
+
+class LoadStats:
+    """
+    Measurements of a load test.
+
+    Attributes:
+        decisions (int): The number of decisions answered.
+        games (int): The number of games finished.
+        latencies (List[float]): The decision latencies, in seconds.
+        elapsed (float): The wall-clock duration of the test, in seconds.
+    """
+
+    def __init__(self):
+        self.decisions = 0
+        self.games = 0
+        self.latencies: List[float] = []
+        self.elapsed = 0.0
+
+    def percentile(self, fraction: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+    def __str__(self):
+        rate = self.decisions / self.elapsed if self.elapsed else 0.0
+        return (
+            f"{self.games} games, {self.decisions} decisions in {self.elapsed:.2f}s: "
+            f"{rate:.0f} decisions/s, latency p50 {self.percentile(0.5) * 1000:.2f}ms, "
+            f"p99 {self.percentile(0.99) * 1000:.2f}ms"
+        )
+
+async def _connect(address: Tuple[str, int], unix: Optional[str]):
+    if unix:
+        return await asyncio.open_unix_connection(unix)
+    return await asyncio.open_connection(*address)
+
+async def _bot(address, unix, table: str, name: str, players: int, clock: List[Optional[float]], stats: LoadStats, rng: random.Random):
+    reader, writer = await _connect(address, unix)
+    writer.write(json.dumps({'type': 'join', 'table': table, 'name': name, 'players': players}).encode() + b'\n')
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        message = json.loads(line)
+        kind = message['type']
+        if kind == 'decision':
+            # clock[0] is the time of the last answer sent at this table.
+            if clock[0] is not None:
+                stats.latencies.append(time.perf_counter() - clock[0])
+            value = _answer(message, rng)
+            writer.write(json.dumps({'type': 'answer', 'id': message['id'], 'value': value}).encode() + b'\n')
+            clock[0] = time.perf_counter()
+            stats.decisions += 1
+        elif kind == 'over':
+            if name.endswith('/0'):
+                stats.games += 1
+            break
+    writer.close()
+
+async def _idle(address, unix, table: str, done: asyncio.Event):
+    reader, writer = await _connect(address, unix)
+    writer.write(json.dumps({'type': 'join', 'table': table, 'name': 'idle', 'players': 2}).encode() + b'\n')
+    await done.wait()
+    writer.close()
+
+async def run_load(tables: int, players: int = 2, idle: int = 0, host: str = '127.0.0.1', port: int = 8765, unix: Optional[str] = None, seed: int = 0) -> LoadStats:
+    """Play ``tables`` games at once against a running server and return the measurements."""
+    stats = LoadStats()
+    rng = random.Random(seed)
+    run = f"{seed}-{time.time_ns()}"
+    done = asyncio.Event()
+    idlers = [asyncio.create_task(_idle((host, port), unix, f"idle-{run}-{i}", done)) for i in range(idle)]
+
+    start = time.perf_counter()
+    bots = []
+    for table in range(tables):
+        clock = [None]
+        for seat in range(players):
+            name = f"{table}/{seat}"
+            bots.append(_bot((host, port), unix, f"load-{run}-{table}", name, players, clock, stats, random.Random(rng.random())))
+    await asyncio.gather(*bots)
+    stats.elapsed = time.perf_counter() - start
+
+    done.set()
+    await asyncio.gather(*idlers)
+    return stats
+
+def _wait_for_port(host: str, port: int, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            socket.create_connection((host, port), 0.5).close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Load-test a Dragons Hoard server.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help="Connect to this Unix socket path instead of TCP.")
+    parser.add_argument('--tables', type=int, default=100)
+    parser.add_argument('--players', type=int, default=2)
+    parser.add_argument('--idle', type=int, default=0, help="Idle clients waiting in half-empty tables.")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--spawn', action='store_true', help="Start a local server for the test.")
+    parser.add_argument('--max-turns', type=int, default=200, help="Turn limit of a spawned server.")
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn:
+        command = [sys.executable, 'server.py', '--max-turns', str(args.max_turns)]
+        command += ['--unix', args.unix] if args.unix else ['--host', args.host, '--port', str(args.port)]
+        server = subprocess.Popen(command)
+        if args.unix:
+            time.sleep(1.0)
+        else:
+            _wait_for_port(args.host, args.port)
+    try:
+        print(asyncio.run(run_load(args.tables, args.players, args.idle, args.host, args.port, args.unix, args.seed)))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
@@ -0,0 +1,360 @@
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from math import log, sqrt
+from typing import Dict, List, Optional, Set, Tuple
+import random
+import time
+from game import Game, Action, Recorder
+from player import Player
+from physical import Card, card_of
+from hand import PokerHand
+from policy import Policy, GreedyPolicy
+from state import GameState, StateAction, cards_of, mask_of
+
+class InformationSet:
+    """
+    What one player can see of a game, from which hidden cards are sampled.
+
+    Attributes:
+        observer (int): The index of the observing player.
+        hands (List[int]): The observer's own hand mask, and for every opponent the
+            mask of their cards known from challenges.
+        hand_sizes (List[int]): The number of cards in each player's hand.
+        treasure (List[int]): The uids of the treasure deck, oldest first.
+        stored (List[Tuple[int, ...]]): The stored hands of each player, as bitmasks.
+        deck_size (int): The number of cards left in the main deck.
+        current (int): The index of the player to move.
+        turn (int): The number of turns played so far.
+        cards (int): The number of cards in the game's shoe.
+    """
+
+    def __init__(self, observer: int, hands: List[int], hand_sizes: List[int], treasure: List[int], stored: List[Tuple[int, ...]], deck_size: int, current: int, turn: int, cards: int = 52):
+        self.observer = observer
+        self.hands = hands
+        self.hand_sizes = hand_sizes
+        self.treasure = treasure
+        self.stored = stored
+        self.deck_size = deck_size
+        self.current = current
+        self.turn = turn
+        self.cards = cards
+
+    @classmethod
+    def from_game(cls, game: Game, observer: Player, revealed: Dict[str, Set[Card]]) -> 'InformationSet':
+        visible = observer.mask | mask_of(game.treasure_deck)
+        for player in game.players:
+            for hand in player.stored_hands:
+                visible |= mask_of(hand)
+
+        hands = []
+        for player in game.players:
+            if player is observer:
+                hands.append(player.mask)
+                continue
+            # Revealed cards stay in the opponent's hand until seen leaving it.
+            hands.append(mask_of(card for card in revealed.get(player.name, ()) if not visible & card.mask))
+
+        return cls(
+            game.players.index(observer),
+            hands,
+            [len(player.hand) for player in game.players],
+            [card.uid for card in game.treasure_deck],
+            [tuple(mask_of(hand) for hand in player.stored_hands) for player in game.players],
+            len(game.main_deck),
+            game.current_player_index,
+            game.turn,
+            52 * game.main_deck.decks,
+        )
+
+    def determinize(self, rng: random.Random) -> GameState:
+        """Sample a full game state consistent with everything the observer has seen."""
+        seen = 0
+        for hand in self.hands:
+            seen |= hand
+        for code in self.treasure:
+            seen |= 1 << code
+        for stored in self.stored:
+            for hand in stored:
+                seen |= hand
+
+        unseen = [uid for uid in range(self.cards) if not seen >> uid & 1]
+        rng.shuffle(unseen)
+        hands = list(self.hands)
+        for player, size in enumerate(self.hand_sizes):
+            missing = size - hands[player].bit_count()
+            for code in unseen[len(unseen) - missing:]:
+                hands[player] |= 1 << code
+            del unseen[len(unseen) - missing:]
+
+        deck = unseen[:self.deck_size]
+        deck = bytearray(deck) if self.cards <= 256 else array('H', deck)
+        return GameState(deck, list(self.treasure), hands, list(self.stored), self.current, self.turn)
+
+class _RevealTracker(Recorder):
+    """
+    A game recorder that forgets a player's revealed cards once they are seen
+    leaving the player's hand: swapped into the treasure deck or stored.
+    """
+
+    def __init__(self, game: Game, revealed: Dict[str, Set[Card]]):
+        self.names = [player.name for player in game.players]
+        self.revealed = revealed
+
+    def swap(self, player: int, hand_uid: int, treasure_uid: int):
+        self.revealed.get(self.names[player], set()).discard(card_of(hand_uid))
+
+    def store(self, player: int, uids):
+        known = self.revealed.get(self.names[player], set())
+        for uid in uids:
+            known.discard(card_of(uid))
+
+class SearchStats:
+    """
+    Throughput of the most recent search.
+
+    Attributes:
+        iterations (int): The number of determinize-select-rollout iterations run.
+        elapsed (float): The wall-clock time of the search, in seconds.
+    """
+
+    def __init__(self, iterations: int = 0, elapsed: float = 0.0):
+        self.iterations = iterations
+        self.elapsed = elapsed
+
+    @property
+    def rollouts_per_second(self) -> float:
+        return self.iterations / self.elapsed if self.elapsed else 0.0
+
+class _Node:
+    __slots__ = ('player', 'children', 'visits', 'wins', 'available')
+
+    def __init__(self, player: int):
+        self.player = player
+        self.children: Dict[Tuple, '_Node'] = {}
+        self.visits = 0
+        self.wins = 0.0
+        self.available = 0
+
+def _key(action: StateAction) -> Tuple:
+    """Return the part of an action its player chooses; the opponent's cards are not."""
+    if action[0] is Action.CHALLENGE:
+        return (action[0], action[1], action[2], action[4])
+    return action
+
+def _rollout_action(state: GameState, rng: random.Random) -> StateAction:
+    """Pick a cheap uniformly random action for a playout."""
+    player = state.current
+    hand = state.hands[player]
+    size = hand.bit_count()
+    opponents = [p for p, other in enumerate(state.hands) if p != player and other.bit_count() >= 3]
+
+    kinds = []
+    if size < 13 and state.deck:
+        kinds.append(Action.DECK)
+    if state.treasure and hand:
+        kinds.append(Action.TREASURE)
+    if size >= 3 and opponents:
+        kinds.append(Action.CHALLENGE)
+    if size >= 5:
+        kinds.append(Action.STORE)
+    if not kinds:
+        return (Action.DECK,)
+
+    kind = rng.choice(kinds)
+    if kind is Action.DECK:
+        return (Action.DECK,)
+    codes = [card.uid for card in cards_of(hand)]
+    if kind is Action.TREASURE:
+        return (Action.TREASURE, rng.choice(codes), rng.choice(state.treasure))
+    if kind is Action.CHALLENGE:
+        opponent = rng.choice(opponents)
+        theirs = [card.uid for card in cards_of(state.hands[opponent])]
+        challenge_size = rng.randint(3, min(size, len(theirs), 5))
+        challenger_mask = sum(1 << code for code in rng.sample(codes, challenge_size))
+        opponent_mask = sum(1 << code for code in rng.sample(theirs, challenge_size))
+        return (Action.CHALLENGE, opponent, challenger_mask, opponent_mask, rng.choice('MT'))
+    cards, (category, _) = PokerHand.best(cards_of(hand), 5)
+    return (Action.STORE, mask_of(cards)) if category > PokerHand.HIGH_CARD else (Action.DECK,)
+
+def _rewards(state: GameState) -> List[float]:
+    """Share one point between the players with the best projected stored hand."""
+    scores = state.scores()
+    for player, hand in enumerate(state.hands):
+        if hand.bit_count() >= 5:
+            # Cards still in hand count for what they could be stored as.
+            category = PokerHand.best(cards_of(hand), 5)[1][0]
+            if category > PokerHand.HIGH_CARD:
+                scores[player] = max(scores[player], category)
+    best = max(scores)
+    winners = [player for player, score in enumerate(scores) if score == best]
+    return [1.0 / len(winners) if player in winners else 0.0 for player in range(len(scores))]
+
+def search(info: InformationSet, iterations: Optional[int], time_limit: Optional[float], seed: int, exploration: float = 0.7, rollout_depth: int = 20) -> Tuple[Dict[Tuple, Tuple[int, float]], int]:
+    """
+    Run single-observer information-set MCTS from ``info``.
+
+    Every iteration samples a determinization, descends the shared tree choosing
+    among the children legal in that determinization (UCB1 with availability
+    counts), expands one node, plays a random playout of at most ``rollout_depth``
+    turns and backs the result up to each node's acting player.
+
+    Returns:
+        Tuple[Dict[Tuple, Tuple[int, float]], int]: The visits and wins of each root
+        action, keyed by the observer's part of the action, and the iterations run.
+    """
+    rng = random.Random(seed)
+    root = _Node(info.observer)
+    deadline = time.perf_counter() + time_limit if time_limit is not None else None
+    done = 0
+
+    while (iterations is None or done < iterations) and (deadline is None or time.perf_counter() < deadline):
+        state = info.determinize(rng)
+        node = root
+        path = [root]
+
+        while not state.is_over():
+            legal = {_key(action): action for action in state.legal_actions()}
+            if not legal:
+                break
+            untried = [key for key in legal if key not in node.children]
+            if untried:
+                key = rng.choice(untried)
+                child = node.children[key] = _Node(state.current)
+                state.apply(legal[key])
+                path.append(child)
+                break
+
+            best_key, best_score = None, -1.0
+            for key in legal:
+                child = node.children[key]
+                child.available += 1
+                score = child.wins / child.visits + exploration * sqrt(log(child.available) / child.visits)
+                if score > best_score:
+                    best_key, best_score = key, score
+            node = node.children[best_key]
+            state.apply(legal[best_key])
+            path.append(node)
+
+        for _ in range(rollout_depth):
+            if state.is_over():
+                break
+            state.apply(_rollout_action(state, rng))
+
+        rewards = _rewards(state)
+        for visited in path:
+            visited.visits += 1
+            visited.wins += rewards[visited.player]
+        done += 1
+
+    return {key: (child.visits, child.wins) for key, child in root.children.items()}, done
+
+class MCTSPolicy(Policy):
+    """
+    A policy that chooses actions with information-set Monte Carlo tree search.
+
+    Hidden cards (the main deck and opponents' hands) are sampled afresh for every
+    iteration from the cards this player has not seen; opponent cards revealed in
+    challenges stay pinned to their hands until they are swapped or stored. With
+    several workers, each process searches its own tree (root parallelism) and the
+    root statistics are summed. Decisions outside the searched action, such as
+    answering a challenge, are delegated to a ``GreedyPolicy``.
+
+    Attributes:
+        iterations (Optional[int]): The iteration budget per move, per worker.
+        time_limit (Optional[float]): The time budget per move, in seconds.
+        workers (int): The number of worker processes running searches.
+        last_stats (SearchStats): The throughput of the most recent search.
+    """
+
+    def __init__(self, rng: Optional[random.Random] = None, iterations: Optional[int] = None, time_limit: Optional[float] = 1.0, workers: int = 1, exploration: float = 0.7, rollout_depth: int = 20):
+        super().__init__(rng)
+        if iterations is None and time_limit is None:
+            raise ValueError("MCTSPolicy needs an iteration or time budget")
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.workers = workers
+        self.exploration = exploration
+        self.rollout_depth = rollout_depth
+        self.last_stats = SearchStats()
+        self._fallback = GreedyPolicy(self.rng)
+        self._revealed: Dict[str, Set[Card]] = {}
+        self._tracked: Optional[Game] = None
+        self._plan: Optional[Tuple] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def close(self):
+        """Shut down the worker processes, if any."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def observe_reveal(self, game: Game, player: Player, cards: List[Card]):
+        if game is not self._tracked:
+            # Follow the game from its first reveal on, to see revealed cards leave.
+            self._tracked = game
+            self._revealed = {}
+            game.add_recorder(_RevealTracker(game, self._revealed))
+        self._revealed.setdefault(player.name, set()).update(cards)
+
+    def choose_action(self, game: Game, player: Player) -> Action:
+        self._plan = None
+        if not game.available_actions(player):
+            return Action.DECK
+
+        info = InformationSet.from_game(game, player, self._revealed)
+        start = time.perf_counter()
+        if self.workers > 1:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            futures = [
+                self._executor.submit(search, info, self.iterations, self.time_limit, self.rng.getrandbits(64), self.exploration, self.rollout_depth)
+                for _ in range(self.workers)
+            ]
+            results = [future.result() for future in futures]
+        else:
+            results = [search(info, self.iterations, self.time_limit, self.rng.getrandbits(64), self.exploration, self.rollout_depth)]
+
+        totals: Dict[Tuple, int] = {}
+        for root, _ in results:
+            for key, (visits, _) in root.items():
+                totals[key] = totals.get(key, 0) + visits
+        self.last_stats = SearchStats(sum(done for _, done in results), time.perf_counter() - start)
+
+        if not totals:
+            return self._fallback.choose_action(game, player)
+        self._plan = max(totals, key=totals.get)
+        return self._plan[0]
+
+    def choose_card_from_hand(self, game: Game, player: Player) -> Card:
+        if self._plan is not None and self._plan[0] is Action.TREASURE:
+            return card_of(self._plan[1])
+        return self._fallback.choose_card_from_hand(game, player)
+
+    def choose_card_from_treasure(self, game: Game, player: Player) -> Card:
+        if self._plan is not None and self._plan[0] is Action.TREASURE:
+            return card_of(self._plan[2])
+        return self._fallback.choose_card_from_treasure(game, player)
+
+    def choose_opponent(self, game: Game, player: Player, opponents: List[Player]) -> Player:
+        if self._plan is not None and self._plan[0] is Action.CHALLENGE and game.players[self._plan[1]] in opponents:
+            return game.players[self._plan[1]]
+        return self._fallback.choose_opponent(game, player, opponents)
+
+    def choose_challenge_size(self, game: Game, player: Player, max_size: int) -> int:
+        if self._plan is not None and self._plan[0] is Action.CHALLENGE:
+            return min(self._plan[2].bit_count(), max_size)
+        return self._fallback.choose_challenge_size(game, player, max_size)
+
+    def choose_cards(self, game: Game, player: Player, num_cards: int) -> List[Card]:
+        if game.players[game.current_player_index] is player and self._plan is not None:
+            kind = self._plan[0]
+            if kind is Action.CHALLENGE or kind is Action.STORE:
+                cards = cards_of(self._plan[2] if kind is Action.CHALLENGE else self._plan[1])
+                if len(cards) == num_cards:
+                    return cards
+        return self._fallback.choose_cards(game, player, num_cards)
+
+    def choose_draw_source(self, game: Game, player: Player) -> str:
+        if game.players[game.current_player_index] is player and self._plan is not None and self._plan[0] is Action.CHALLENGE:
+            return 'treasure' if self._plan[3] == 'T' else 'main'
+        return self._fallback.choose_draw_source(game, player)
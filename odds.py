@@ -0,0 +1,251 @@
+from bisect import bisect_left
+from collections import Counter
+from itertools import accumulate
+from math import comb
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from physical import Card
+from hand import PokerHand, rank_classes
+from tables import load_tables, save_tables, table_path
+
+class ChallengeOdds:
+    """
+    Distribution of the strength of a random opponent hand of one size.
+
+    Attributes:
+        size (int): The number of cards in the challenge (3-5).
+        strengths (Sequence[int]): The distinct hand strengths, in increasing order.
+        cumulative (Sequence[int]): ``cumulative[i]`` is the number of hands weaker than
+            ``strengths[i]``; the last entry is the total number of hands.
+    """
+
+    def __init__(self, size: int, counts: Dict[int, int]):
+        self.size = size
+        self.strengths = sorted(counts)
+        self.cumulative = [0]
+        for strength in self.strengths:
+            self.cumulative.append(self.cumulative[-1] + counts[strength])
+
+    @classmethod
+    def from_cumulative(cls, size: int, strengths: Sequence[int], cumulative: Sequence[int]) -> 'ChallengeOdds':
+        """Wrap existing tables (e.g. mapped from a table file) without copying them."""
+        odds = cls.__new__(cls)
+        odds.size = size
+        odds.strengths = strengths
+        odds.cumulative = cumulative
+        return odds
+
+    @property
+    def total(self) -> int:
+        return self.cumulative[-1]
+
+    def beat_probability(self, strength: int) -> float:
+        """Return the probability that a random hand is strictly weaker than ``strength``."""
+        if not self.total:
+            return 0.0
+        return self.cumulative[bisect_left(self.strengths, strength)] / self.total
+
+    def win_probability(self, strength: int) -> float:
+        """
+        Return the probability of winning a challenge with a hand of ``strength``.
+
+        Challenges compare hand ranks only and the opponent wins ties, so this is the
+        probability that a random hand has a strictly lower rank.
+        """
+        return self.beat_probability(strength >> 20 << 20)
+
+    def counts(self) -> Dict[int, int]:
+        """Return the number of hands of each strength that occurs."""
+        cumulative = self.cumulative
+        return {strength: cumulative[i + 1] - cumulative[i] for i, strength in enumerate(self.strengths) if cumulative[i + 1] > cumulative[i]}
+
+_ODDS: Dict[int, ChallengeOdds] = {}
+_FULL_SUIT = sum(1 << value for value in range(2, 15))
+# _COMB[available][copies] for the up to 4 copies of a value in a deck.
+_COMB = [[comb(available, copies) for copies in range(6)] for available in range(5)]
+
+class _ClassTable:
+    """
+    The rank classes of one hand size with their full-deck hand counts, from which
+    the counts for a deck with known cards removed are derived.
+
+    Attributes:
+        strengths (List[int]): Every strength a hand of this size can have, in order.
+        counts (List[int]): The number of full-deck hands of each strength.
+        classes (List[Tuple]): Per rank class: its (value, copies) pairs, its rank mask
+            if its values are distinct (else 0), and the indices into ``strengths`` of
+            its plain and flush strength (-1 if it cannot be a flush).
+        plain (List[int]): The number of full-deck hands of each class that are not
+            flushes.
+        by_value (List[List[int]]): For each value, the classes that contain it.
+    """
+
+    def __init__(self, size: int):
+        classes = list(rank_classes(size))
+        self.strengths = sorted({strength for _, strength, _ in classes} | {flush for _, _, flush in classes if flush is not None})
+        index = {strength: i for i, strength in enumerate(self.strengths)}
+        self.counts = [0] * len(self.strengths)
+        self.classes = []
+        self.plain = []
+        self.by_value: List[List[int]] = [[] for _ in range(15)]
+        for i, (values, strength, flush) in enumerate(classes):
+            multiset = tuple(Counter(values).items())
+            rank_mask = sum(1 << value for value in values) if flush is not None else 0
+            self.classes.append((multiset, rank_mask, index[strength], index[flush] if flush is not None else -1))
+            ways = 1
+            for value, copies in multiset:
+                ways *= _COMB[4][copies]
+                self.by_value[value].append(i)
+            if rank_mask:
+                ways -= 4
+                self.counts[index[flush]] += 4
+            self.plain.append(ways)
+            self.counts[index[strength]] += ways
+        self._arrays = None
+
+    def cumulative(self, suit_masks: List[int]) -> List[int]:
+        """
+        Return the cumulative hand counts by strength (see ``ChallengeOdds.cumulative``)
+        using only the available cards: ``suit_masks`` holds, for each suit, a bitmask
+        of the values still available.
+
+        A class's count is the product of the ways to pick each value's suits, minus
+        the single-suited hands, which are flushes. With NumPy, the counts of every
+        class are taken from array lookups over the class table at once; without it,
+        only the classes containing a value with a missing card are recomputed and
+        their difference applied to the full-deck counts.
+        """
+        per_value = [0] * 15
+        for mask in suit_masks:
+            for value in range(2, 15):
+                per_value[value] += mask >> value & 1
+        try:
+            import numpy as np
+        except ImportError:
+            pass
+        else:
+            return self._cumulative_numpy(np, per_value, suit_masks)
+        counts = list(self.counts)
+        affected = set()
+        for value in range(2, 15):
+            if per_value[value] < 4:
+                affected.update(self.by_value[value])
+        classes, plain = self.classes, self.plain
+        for i in affected:
+            multiset, rank_mask, strength, flush = classes[i]
+            ways = 1
+            for value, copies in multiset:
+                ways *= _COMB[per_value[value]][copies]
+                if not ways:
+                    break
+            if ways and rank_mask:
+                flushes = 0
+                for mask in suit_masks:
+                    if mask & rank_mask == rank_mask:
+                        flushes += 1
+                ways -= flushes
+                counts[flush] += flushes - 4
+            elif rank_mask:
+                counts[flush] -= 4
+            counts[strength] += ways - plain[i]
+        return list(accumulate(counts, initial=0))
+
+    def _cumulative_numpy(self, np, per_value: List[int], suit_masks: List[int]) -> List[int]:
+        """``cumulative`` for every class at once, on arrays built from the class table."""
+        if self._arrays is None:
+            # Each class as 5 keys value * 6 + copies into the per-call ways table,
+            # padded with key 0 (value 0, no copies: 1 way).
+            keys = [[value * 6 + copies for value, copies in multiset] + [0] * (5 - len(multiset)) for multiset, _, _, _ in self.classes]
+            self._arrays = (
+                np.array(keys, dtype=np.intp).T.copy(),
+                np.array([rank_mask for _, rank_mask, _, _ in self.classes], dtype=np.int64),
+                np.array([strength for _, _, strength, _ in self.classes], dtype=np.intp),
+                np.array([max(flush, 0) for _, _, _, flush in self.classes], dtype=np.intp),
+            )
+        keys, rank_masks, strengths, flushes_at = self._arrays
+        ways_table = np.array([_COMB[available][copies] for available in per_value for copies in range(6)], dtype=np.int64)
+        ways = ways_table.take(keys[0])
+        for column in keys[1:]:
+            ways *= ways_table.take(column)
+        flushes = np.zeros(len(ways), dtype=np.int64)
+        for mask in suit_masks:
+            flushes += (rank_masks & mask) == rank_masks
+        flushes[rank_masks == 0] = 0
+        size = len(self.strengths)
+        counts = np.bincount(strengths, weights=ways - flushes, minlength=size)
+        counts += np.bincount(flushes_at, weights=flushes, minlength=size)
+        cumulative = np.zeros(size + 1, dtype=np.int64)
+        cumulative[1:] = np.cumsum(counts)
+        return cumulative.tolist()
+
+_TABLES: Dict[int, _ClassTable] = {}
+
+def _class_table(size: int) -> _ClassTable:
+    if size not in _TABLES:
+        _TABLES[size] = _ClassTable(size)
+    return _TABLES[size]
+
+def cache_path() -> str:
+    """Return the path of the on-disk odds tables (see ``tables.table_path``)."""
+    return table_path('challenge-odds')
+
+def _load_cache(path: str) -> bool:
+    names = [f'{kind}{size}' for kind in ('strengths', 'cumulative') for size in (3, 4, 5)]
+    tables = load_tables(path, dict.fromkeys(names))
+    if tables is None:
+        return False
+    for size in (3, 4, 5):
+        cumulative = tables[f'cumulative{size}']
+        if len(cumulative) != len(tables[f'strengths{size}']) + 1 or cumulative[-1] != comb(52, size):
+            return False
+    for size in (3, 4, 5):
+        _ODDS[size] = ChallengeOdds.from_cumulative(size, tables[f'strengths{size}'], tables[f'cumulative{size}'])
+    return True
+
+def _save_cache(path: str):
+    tables = {}
+    for size, odds in _ODDS.items():
+        tables[f'strengths{size}'] = odds.strengths
+        tables[f'cumulative{size}'] = odds.cumulative
+    save_tables(path, tables)
+
+def challenge_odds(size: int) -> ChallengeOdds:
+    """
+    Return the strength distribution of a uniformly random ``size``-card hand from
+    a single 52-card deck.
+
+    The tables for all sizes are computed once and saved to a table file; later
+    calls and later processes map them from the file.
+    """
+    if size not in _ODDS:
+        path = cache_path()
+        if not _load_cache(path) or size not in _ODDS:
+            for table_size in (3, 4, 5):
+                table = _class_table(table_size)
+                _ODDS[table_size] = ChallengeOdds(table_size, {strength: count for strength, count in zip(table.strengths, table.counts) if count})
+            _save_cache(path)
+    return _ODDS[size]
+
+def conditional_odds(size: int, known: Iterable[Card]) -> ChallengeOdds:
+    """
+    Return the strength distribution of a random ``size``-card hand drawn from the
+    cards not in ``known`` (e.g. the treasure deck and the challenger's own hand).
+    Like ``challenge_odds``, this models a single deck; copies of a card from other
+    decks count as that card. The full-deck counts per rank class are computed once;
+    each call only adjusts the classes that contain a value of a known card.
+    """
+    suit_masks = [_FULL_SUIT] * 4
+    for card in known:
+        suit_masks[card.code // 13] &= ~(1 << card.value)
+    table = _class_table(size)
+    return ChallengeOdds.from_cumulative(size, table.strengths, table.cumulative(suit_masks))
+
+def win_probability(cards: List[Card], known: Optional[Iterable[Card]] = None) -> float:
+    """
+    Return the probability that challenging with ``cards`` beats a random opponent hand.
+
+    If ``known`` is given, the opponent's hand is drawn from the cards outside it;
+    ``cards`` should normally be part of ``known``.
+    """
+    strength = PokerHand(cards).strength()
+    odds = challenge_odds(len(cards)) if known is None else conditional_odds(len(cards), known)
+    return odds.win_probability(strength)
@@ -1,5 +1,8 @@
+from array import array
+from collections import OrderedDict
 from enum import Enum, auto
-from typing import List, Optional
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional
 import random
 
 class Suit(Enum):
@@ -27,31 +30,183 @@ class Card:
     """
     Represents a playing card with a suit and rank.
 
+    Cards are interned: there is exactly one instance per suit/rank pair of each
+    deck in a shoe, shared by every game, so ``Card(suit, rank)`` never allocates
+    and cards compare and hash by identity. The copies of a card in a multi-deck
+    shoe are distinct cards that share their ``code``.
+
     Attributes:
         suit (Suit): The suit of the card.
         rank (Rank): The rank of the card.
+        code (int): The compact encoding of the card, ``suit_index * 13 + rank_index``
+            in ``range(52)``.
+        value (int): The numeric rank value of the card (2-14).
+        deck (int): The index of the deck the card belongs to (0 for the first deck).
+        uid (int): The card's identity in a shoe, ``deck * 52 + code``; equal to
+            ``code`` for the first deck.
+        mask (int): The card's bit in a card set, ``1 << uid``.
     """
 
-    def __init__(self, suit: Suit, rank: Rank):
-        self.suit = suit
-        self.rank = rank
+    __slots__ = ('suit', 'rank', 'code', 'value', 'deck', 'uid', 'mask')
+
+    def __new__(cls, suit: Suit, rank: Rank, deck: int = 0):
+        return card_of(deck * 52 + encode(suit, rank))
+
+    @classmethod
+    def from_code(cls, code: int) -> 'Card':
+        return CARDS[code]
+
+    def __reduce__(self):
+        return (card_of, (self.uid,))
 
     def __str__(self):
+        if self.deck:
+            return f"{self.rank.name} of {self.suit.name} (deck {self.deck + 1})"
         return f"{self.rank.name} of {self.suit.name}"
 
+def encode(suit: Suit, rank: Rank) -> int:
+    """Return the compact code of the card with the given suit and rank."""
+    return (suit.value - 1) * 13 + rank.value - 2
+
+def _make_card(suit: Suit, rank: Rank, deck: int = 0) -> Card:
+    card = object.__new__(Card)
+    card.suit = suit
+    card.rank = rank
+    card.code = encode(suit, rank)
+    card.value = rank.value
+    card.deck = deck
+    card.uid = deck * 52 + card.code
+    card.mask = 1 << card.uid
+    return card
+
+CARDS = tuple(_make_card(suit, rank) for suit in Suit for rank in Rank)
+
+# Every card of every deck made so far, indexed by uid.
+SHOE: List[Card] = list(CARDS)
+
+def _extend_shoe(decks: int):
+    for deck in range(len(SHOE) // 52, decks):
+        SHOE.extend(_make_card(suit, rank, deck) for suit in Suit for rank in Rank)
+
+def card_of(uid: int) -> Card:
+    """Return the card with the given ``Card.uid``."""
+    if uid >= len(SHOE):
+        _extend_shoe(uid // 52 + 1)
+    return SHOE[uid]
+
+# Shoes of up to this many decks store their uids in one byte each.
+MAX_SMALL_DECKS = 4
+
+def decks_for(players: int) -> int:
+    """Return the number of decks a table of ``players`` plays with: one per 3 players."""
+    return max(1, -(-players // 3))
+
 class Deck:
     """
     Represents a deck of playing cards.
 
+    The deck is stored as a buffer of card uids; cards are only looked up (as the
+    interned ``Card`` instances) when they are drawn. A deck can be a shoe of
+    several standard decks.
+
     Attributes:
-        cards (List[Card]): The list of cards in the deck.
+        decks (int): The number of standard decks in the shoe.
+        codes (bytearray): The uids of the cards in the deck, top of the deck last
+            (an ``array('H')`` for shoes of more than 4 decks).
     """
 
-    def __init__(self):
-        self.cards = [Card(suit, rank) for suit in Suit for rank in Rank]
+    def __init__(self, decks: int = 1):
+        self.decks = decks
+        _extend_shoe(decks)
+        uids = range(52 * decks)
+        self.codes = bytearray(uids) if decks <= MAX_SMALL_DECKS else array('H', uids)
+
+    @property
+    def cards(self) -> List[Card]:
+        return [SHOE[uid] for uid in self.codes]
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def shuffle(self, rng: Optional[random.Random] = None):
+        (rng or random).shuffle(self.codes)
+
+    def arrange(self, uids: Iterable[int]):
+        """
+        Put the deck in the given order instead of shuffling it.
 
-    def shuffle(self):
-        random.shuffle(self.cards)
+        Args:
+            uids: Every card uid of the shoe once, top of the deck last; e.g. a list, or
+                a row of ``deals.shuffled_decks``.
+
+        Raises:
+            ValueError: If ``uids`` is not an ordering of the shoe.
+        """
+        if self.decks <= MAX_SMALL_DECKS:
+            codes = bytearray(uids)
+            valid = len(codes) == 52 * self.decks and len(set(codes)) == len(codes) and max(codes) < len(codes)
+        else:
+            codes = array('H', uids)
+            valid = sorted(codes) == list(range(52 * self.decks))
+        if not valid:
+            raise ValueError(f"Not an ordering of a {self.decks}-deck shoe")
+        self.codes = codes
 
     def draw(self) -> Optional[Card]:
-        return self.cards.pop() if self.cards else None
\ No newline at end of file
+        return SHOE[self.codes.pop()] if self.codes else None
+
+    def deal(self, count: int) -> List[Card]:
+        """Draw up to ``count`` cards at once, in the order ``draw`` would return them."""
+        codes = self.codes
+        taken = codes[len(codes) - min(count, len(codes)):]
+        del codes[len(codes) - len(taken):]
+        return [SHOE[uid] for uid in reversed(taken)]
+
+class CardPile:
+    """
+    An ordered pile of cards, oldest first, such as the treasure deck.
+
+    Appending, removing any card and removing the oldest card are O(1). The pile
+    reads like a list of cards: it supports ``len``, iteration, membership and
+    indexing (O(1) at either end).
+    """
+
+    __slots__ = ('_cards',)
+
+    def __init__(self, cards: Iterable[Card] = ()):
+        self._cards = OrderedDict.fromkeys(cards)
+
+    def append(self, card: Card):
+        self._cards[card] = None
+
+    def remove(self, card: Card):
+        try:
+            del self._cards[card]
+        except KeyError:
+            raise ValueError(f"{card} is not in the pile") from None
+
+    def popleft(self) -> Card:
+        """Remove and return the oldest card."""
+        return self._cards.popitem(last=False)[0]
+
+    def __len__(self) -> int:
+        return len(self._cards)
+
+    def __iter__(self) -> Iterator[Card]:
+        return iter(self._cards)
+
+    def __contains__(self, card) -> bool:
+        return card in self._cards
+
+    def __getitem__(self, index: int) -> Card:
+        size = len(self._cards)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("pile index out of range")
+        if index == size - 1:
+            return next(reversed(self._cards))
+        return next(islice(self._cards, index, None))
+
+    def __repr__(self):
+        return f"CardPile({list(self._cards)!r})"
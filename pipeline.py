@@ -0,0 +1,439 @@
+"""
+Streaming statistics over any number of headless games, in constant memory.
+
+Games are played one at a time and summarized as ``GameSummary`` records, which
+flow through stages: generator functions from records to records, composed with
+``run``. ``where`` filters records, ``accumulate`` adds them to a ``GameStats``,
+and ``checkpoint`` appends the running statistics to JSONL and/or CSV files.
+
+    stats = GameStats(2)
+    run(play_stream(seed=1), where(lambda game: not game.truncated), accumulate(stats),
+        checkpoint(stats, every=10000, jsonl='stats.jsonl'), limit=1000000)
+
+Every accumulator has a fixed size and a ``merge`` method, so statistics gathered
+in several processes (see ``collect``) or read back from checkpoints (``from_dict``)
+add up to the statistics of all their games.
+
+    python pipeline.py --games 1000000 --workers 4 --every 50000 --jsonl stats.jsonl
+"""
+from itertools import count, islice
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+import argparse
+import csv
+import json
+import os
+import time
+from game import Game, Recorder
+from hand import PokerHand
+from headless import PolicyFactory, game_seed, play_game
+from policy import GreedyPolicy
+from tournament import run_chunks
+
+CATEGORIES = PokerHand.ROYAL_FLUSH + 1
+
+class GameSummary(NamedTuple):
+    """
+    The outcome of one game.
+
+    Attributes:
+        index (int): The index of the game in its stream.
+        seats (int): The number of players.
+        winner (int): The seat of the winning player.
+        turns (int): The number of turns played.
+        truncated (bool): Whether the game was stopped by the turn limit.
+        locked (bool): Whether the game ended in the lock condition.
+        stored (Tuple[Tuple[int, ...], ...]): For each seat, the rank of every hand stored.
+        challenges (Tuple[Tuple[int, int], ...]): The challenger's and the opponent's hand
+            rank in every challenge, in order.
+    """
+    index: int
+    seats: int
+    winner: int
+    turns: int
+    truncated: bool
+    locked: bool
+    stored: Tuple[Tuple[int, ...], ...]
+    challenges: Tuple[Tuple[int, int], ...]
+
+class _ChallengeRecorder(Recorder):
+    """Keeps the hand ranks of every challenge of a game."""
+
+    def __init__(self):
+        self.challenges: List[Tuple[int, int]] = []
+
+    def challenge(self, challenger: int, opponent: int, challenger_rank: int, opponent_rank: int):
+        self.challenges.append((challenger_rank, opponent_rank))
+
+def summarize(game: Game, index: int, challenges: Sequence[Tuple[int, int]] = ()) -> GameSummary:
+    """Summarize a finished game."""
+    return GameSummary(
+        index,
+        len(game.players),
+        game.players.index(game.winner),
+        game.turn,
+        not game.is_game_over(),
+        game.locked,
+        tuple(tuple(PokerHand(hand).strength() >> 20 for hand in player.stored_hands) for player in game.players),
+        tuple(challenges),
+    )
+
+def play_stream(seed: int = 0, policies: Sequence[PolicyFactory] = (GreedyPolicy, GreedyPolicy), max_turns: int = 500, start: int = 0, stop: Optional[int] = None) -> Iterator[GameSummary]:
+    """
+    Play games ``start``, ``start + 1``, ... (up to ``stop``, or forever) and yield
+    their summaries. Game ``i`` is seeded from ``seed`` and ``i`` alone, as in
+    ``tournament.run_tournament``.
+    """
+    for index in (count(start) if stop is None else range(start, stop)):
+        recorder = _ChallengeRecorder()
+        game = play_game(game_seed(seed, index), policies, max_turns, recorder=recorder)
+        yield summarize(game, index, recorder.challenges)
+
+# Stages.
+
+Stage = Callable[[Iterator[GameSummary]], Iterator[GameSummary]]
+
+def where(predicate: Callable[[GameSummary], bool]) -> Stage:
+    """Keep only the games that satisfy ``predicate``."""
+    def stage(games: Iterator[GameSummary]) -> Iterator[GameSummary]:
+        return (game for game in games if predicate(game))
+    return stage
+
+def accumulate(stats: 'GameStats') -> Stage:
+    """Add every game to ``stats`` and pass it on."""
+    def stage(games: Iterator[GameSummary]) -> Iterator[GameSummary]:
+        add = stats.add
+        for game in games:
+            add(game)
+            yield game
+    return stage
+
+def checkpoint(stats: 'GameStats', every: int, jsonl: Optional[str] = None, csv_path: Optional[str] = None) -> Stage:
+    """
+    Write ``stats`` to the checkpoint files after every ``every`` games pass, and
+    once more when the stream ends.
+    """
+    def stage(games: Iterator[GameSummary]) -> Iterator[GameSummary]:
+        passed = 0
+        for game in games:
+            yield game
+            passed += 1
+            if passed % every == 0:
+                write_checkpoint(stats, jsonl, csv_path)
+        if passed % every:
+            write_checkpoint(stats, jsonl, csv_path)
+    return stage
+
+def run(source: Iterable[GameSummary], *stages: Stage, limit: Optional[int] = None) -> int:
+    """
+    Pull ``limit`` games (or every game) from ``source`` through ``stages`` in order.
+
+    Returns:
+        int: The number of games that came out of the last stage.
+    """
+    games = iter(source) if limit is None else islice(source, limit)
+    for stage in stages:
+        games = stage(games)
+    passed = 0
+    for _ in games:
+        passed += 1
+    return passed
+
+# Accumulators.
+
+class Histogram:
+    """
+    Counts of non-negative integers in fixed-width bins; the last bin also counts
+    everything above the range.
+
+    Attributes:
+        width (int): The width of each bin.
+        counts (List[int]): The count of each bin.
+    """
+
+    def __init__(self, bins: int, width: int = 1):
+        self.width = width
+        self.counts = [0] * bins
+
+    def add(self, value: int, weight: int = 1):
+        self.counts[min(value // self.width, len(self.counts) - 1)] += weight
+
+    def merge(self, other: 'Histogram'):
+        if other.width != self.width or len(other.counts) != len(self.counts):
+            raise ValueError("Cannot merge histograms with different bins")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+
+    def to_dict(self) -> Dict:
+        return {'width': self.width, 'counts': list(self.counts)}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Histogram':
+        histogram = cls(len(data['counts']), data['width'])
+        histogram.counts = list(data['counts'])
+        return histogram
+
+class Moments:
+    """
+    Count, mean, variance and range of a stream of numbers, updated online
+    (Welford) and merged pairwise (Chan et al.).
+
+    Attributes:
+        count (int): The number of values.
+        mean (float): Their mean.
+        m2 (float): The sum of squared deviations from the mean.
+        min (Optional[float]): The smallest value.
+        max (Optional[float]): The largest value.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = value if self.min is None or value < self.min else self.min
+        self.max = value if self.max is None or value > self.max else self.max
+
+    def merge(self, other: 'Moments'):
+        if not other.count:
+            return
+        if not self.count:
+            self.count, self.mean, self.m2, self.min, self.max = other.count, other.mean, other.m2, other.min, other.max
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def to_dict(self) -> Dict:
+        return {'count': self.count, 'mean': self.mean, 'm2': self.m2, 'min': self.min, 'max': self.max}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Moments':
+        moments = cls()
+        moments.count, moments.mean, moments.m2, moments.min, moments.max = (
+            data['count'], data['mean'], data['m2'], data['min'], data['max'])
+        return moments
+
+class GameStats:
+    """
+    Aggregate statistics of a stream of games, of a fixed size.
+
+    Attributes:
+        seats (int): The number of players at each table.
+        games (int): The number of games added.
+        wins (List[int]): The number of games won by each seat.
+        truncated (int): The number of games stopped by the turn limit.
+        locked (int): The number of games that ended in the lock condition.
+        length (Moments): The number of turns per game.
+        length_histogram (Histogram): The number of turns per game, in bins of 10.
+        stored (Histogram): The number of stored hands of each rank.
+        stored_per_game (Moments): The number of hands stored per game.
+        challenges (Histogram): The number of challenges by hand ranks: bin
+            ``challenger_rank * CATEGORIES + opponent_rank``.
+    """
+
+    def __init__(self, seats: int):
+        self.seats = seats
+        self.games = 0
+        self.wins = [0] * seats
+        self.truncated = 0
+        self.locked = 0
+        self.length = Moments()
+        self.length_histogram = Histogram(100, 10)
+        self.stored = Histogram(CATEGORIES)
+        self.stored_per_game = Moments()
+        self.challenges = Histogram(CATEGORIES * CATEGORIES)
+
+    def add(self, game: GameSummary):
+        self.games += 1
+        self.wins[game.winner] += 1
+        self.truncated += game.truncated
+        self.locked += game.locked
+        self.length.add(game.turns)
+        self.length_histogram.add(game.turns)
+        stored = 0
+        for hands in game.stored:
+            stored += len(hands)
+            for rank in hands:
+                self.stored.add(rank)
+        self.stored_per_game.add(stored)
+        for challenger_rank, opponent_rank in game.challenges:
+            self.challenges.add(challenger_rank * CATEGORIES + opponent_rank)
+
+    def merge(self, other: 'GameStats'):
+        if other.seats != self.seats:
+            raise ValueError("Cannot merge statistics of tables of different sizes")
+        self.games += other.games
+        self.wins = [a + b for a, b in zip(self.wins, other.wins)]
+        self.truncated += other.truncated
+        self.locked += other.locked
+        self.length.merge(other.length)
+        self.length_histogram.merge(other.length_histogram)
+        self.stored.merge(other.stored)
+        self.stored_per_game.merge(other.stored_per_game)
+        self.challenges.merge(other.challenges)
+
+    @property
+    def win_rates(self) -> List[float]:
+        return [wins / self.games if self.games else 0.0 for wins in self.wins]
+
+    @property
+    def challenge_count(self) -> int:
+        return sum(self.challenges.counts)
+
+    @property
+    def challenger_wins(self) -> int:
+        """The number of challenges won by the challenger (a strictly higher rank)."""
+        counts = self.challenges.counts
+        return sum(counts[c * CATEGORIES + o] for c in range(CATEGORIES) for o in range(c))
+
+    def to_dict(self) -> Dict:
+        return {
+            'seats': self.seats,
+            'games': self.games,
+            'wins': list(self.wins),
+            'truncated': self.truncated,
+            'locked': self.locked,
+            'length': self.length.to_dict(),
+            'length_histogram': self.length_histogram.to_dict(),
+            'stored': self.stored.to_dict(),
+            'stored_per_game': self.stored_per_game.to_dict(),
+            'challenges': self.challenges.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'GameStats':
+        stats = cls(data['seats'])
+        stats.games = data['games']
+        stats.wins = list(data['wins'])
+        stats.truncated = data['truncated']
+        stats.locked = data['locked']
+        stats.length = Moments.from_dict(data['length'])
+        stats.length_histogram = Histogram.from_dict(data['length_histogram'])
+        stats.stored = Histogram.from_dict(data['stored'])
+        stats.stored_per_game = Moments.from_dict(data['stored_per_game'])
+        stats.challenges = Histogram.from_dict(data['challenges'])
+        return stats
+
+    def rows(self) -> Iterator[Tuple[str, str, float]]:
+        """Yield the statistics as flat (metric, key, value) rows."""
+        yield 'games', '', self.games
+        for seat, rate in enumerate(self.win_rates):
+            yield 'win_rate', str(seat), rate
+        yield 'truncated', '', self.truncated
+        yield 'locked', '', self.locked
+        for name in ('count', 'mean', 'min', 'max'):
+            yield 'length', name, getattr(self.length, name)
+        yield 'length', 'variance', self.length.variance
+        for rank, stored in enumerate(self.stored.counts):
+            if stored:
+                yield 'stored', str(rank), stored
+        yield 'stored_per_game', 'mean', self.stored_per_game.mean
+        yield 'challenges', '', self.challenge_count
+        yield 'challenger_wins', '', self.challenger_wins
+
+    def __str__(self):
+        rates = ", ".join(f"seat {seat + 1}: {rate:.1%}" for seat, rate in enumerate(self.win_rates))
+        return (
+            f"{self.games} games, mean length {self.length.mean:.1f} turns; {rates}; "
+            f"{self.challenge_count} challenges ({self.challenger_wins} won by the challenger)"
+        )
+
+def write_checkpoint(stats: GameStats, jsonl: Optional[str] = None, csv_path: Optional[str] = None):
+    """Append the current statistics as a JSON line and/or as CSV rows tagged with the game count."""
+    if jsonl:
+        with open(jsonl, 'a') as file:
+            file.write(json.dumps({'time': time.time(), 'stats': stats.to_dict()}) + '\n')
+    if csv_path:
+        new = not os.path.exists(csv_path) or os.path.getsize(csv_path) == 0
+        with open(csv_path, 'a', newline='') as file:
+            writer = csv.writer(file)
+            if new:
+                writer.writerow(['games', 'metric', 'key', 'value'])
+            for metric, key, value in stats.rows():
+                writer.writerow([stats.games, metric, key, value])
+
+def read_checkpoint(jsonl: str) -> GameStats:
+    """Return the statistics of the last checkpoint in a JSONL file."""
+    last = None
+    with open(jsonl) as file:
+        for line in file:
+            if line.strip():
+                last = line
+    if last is None:
+        raise ValueError(f"{jsonl} holds no checkpoint")
+    return GameStats.from_dict(json.loads(last)['stats'])
+
+def collect(seed: int, start: int, stop: int, policies: Sequence[PolicyFactory], max_turns: int) -> GameStats:
+    """Play games ``start`` to ``stop`` and return their statistics (e.g. in a worker process)."""
+    stats = GameStats(len(policies))
+    run(play_stream(seed, policies, max_turns, start, stop), accumulate(stats))
+    return stats
+
+def run_parallel(
+    n_games: Optional[int],
+    seed: int = 0,
+    policies: Sequence[PolicyFactory] = (GreedyPolicy, GreedyPolicy),
+    max_turns: int = 500,
+    workers: Optional[int] = None,
+    chunk_size: int = 1000,
+    on_merge: Optional[Callable[[GameStats], None]] = None,
+) -> GameStats:
+    """
+    Gather the statistics of ``n_games`` games (or keep going forever if None)
+    across worker processes.
+
+    Each worker returns the statistics of a chunk of games, which are merged as
+    they arrive (see ``tournament.run_chunks``), so memory stays constant. ``on_merge`` is called with the running statistics after each merge.
+    """
+    workers = workers or os.cpu_count() or 1
+    stats = GameStats(len(policies))
+    for chunk in run_chunks(collect, n_games, chunk_size, workers, seed, policies, max_turns):
+        stats.merge(chunk)
+        if on_merge is not None:
+            on_merge(stats)
+    return stats
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Stream statistics of headless Dragons Hoard games.")
+    parser.add_argument('--games', type=int, default=10000, help="The number of games; 0 plays until interrupted.")
+    parser.add_argument('--players', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-turns', type=int, default=500)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--every', type=int, default=10000, help="Write a checkpoint after this many games.")
+    parser.add_argument('--jsonl', help="Append checkpoints to this JSONL file.")
+    parser.add_argument('--csv', help="Append checkpoints to this CSV file.")
+    args = parser.parse_args()
+
+    policies = (GreedyPolicy,) * args.players
+    n_games = args.games or None
+    if args.workers > 1:
+        written = [0]
+
+        def on_merge(stats: GameStats):
+            if stats.games - written[0] >= args.every:
+                written[0] = stats.games
+                write_checkpoint(stats, args.jsonl, args.csv)
+
+        chunk_size = max(1, min(1000, args.every // args.workers))
+        result = run_parallel(n_games, args.seed, policies, args.max_turns, args.workers, chunk_size, on_merge)
+        if result.games != written[0]:
+            write_checkpoint(result, args.jsonl, args.csv)
+    else:
+        result = GameStats(args.players)
+        run(play_stream(args.seed, policies, args.max_turns), accumulate(result), checkpoint(result, args.every, args.jsonl, args.csv), limit=n_games)
+    print(result)
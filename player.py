@@ -1,32 +1,103 @@
-from typing import List
+from typing import Dict, List, Optional, Tuple
 from physical import Card
+from hand import PokerHand
 
 class Player:
     """
     Represents a player in the Dragons Hoard game.
 
+    Besides the hand itself, the player keeps an index of it that is updated as cards
+    move in and out, so rank, suit and draw queries (and the ``best_hand`` search)
+    never recount the hand. Removing a card keeps the order of the others, which
+    interfaces list by position; only the positions of the cards after it change.
+
     Attributes:
         name (str): The name of the player.
         hand (List[Card]): The cards in the player's hand.
         stored_hands (List[List[Card]]): The poker hands stored by the player.
+        mask (int): The cards in the player's hand, as a card set (bits ``Card.uid``).
+        rank_counts (List[int]): The number of cards held of each value, indexed by value (2-14).
+        suit_counts (List[int]): The number of cards held of each suit, indexed by suit (0-3).
+        suit_masks (List[int]): For each suit, a bitmask of the values held (bit ``value``).
     """
 
     def __init__(self, name: str):
         self.name = name
         self.hand: List[Card] = []
         self.stored_hands: List[List[Card]] = []
+        self.mask = 0
+        self.rank_counts = [0] * 15
+        self.suit_counts = [0] * 4
+        self.suit_masks = [0] * 4
+        self._positions: Dict[Card, int] = {}
+        self._face_counts = [0] * 52
 
     def add_card(self, card: Card):
         if len(self.hand) < 13:
+            self._positions[card] = len(self.hand)
             self.hand.append(card)
         else:
             raise ValueError("Cannot exceed 13 cards in hand")
+        suit = card.code // 13
+        self.mask |= card.mask
+        self.rank_counts[card.value] += 1
+        self.suit_counts[suit] += 1
+        self.suit_masks[suit] |= 1 << card.value
+        self._face_counts[card.code] += 1
 
     def remove_card(self, card: Card):
-        self.hand.remove(card)
+        position = self._positions.pop(card, None)
+        if position is None:
+            raise ValueError(f"{card} is not in {self.name}'s hand")
+        hand = self.hand
+        del hand[position]
+        for later in range(position, len(hand)):
+            self._positions[hand[later]] = later
+        suit = card.code // 13
+        self.mask &= ~card.mask
+        self.rank_counts[card.value] -= 1
+        self.suit_counts[suit] -= 1
+        self._face_counts[card.code] -= 1
+        if not self._face_counts[card.code]:
+            # Another copy of the card (from another deck) keeps the value held.
+            self.suit_masks[suit] &= ~(1 << card.value)
 
     def store_hand(self, hand: List[Card]):
         # TODO: Implement poker hand validation
         self.stored_hands.append(hand)
         for card in hand:
-            self.remove_card(card)
\ No newline at end of file
+            self.remove_card(card)
+
+    def holds(self, card: Card) -> bool:
+        return bool(self.mask & card.mask)
+
+    def max_of_a_kind(self) -> int:
+        """Return the largest number of cards held of a single value."""
+        return max(self.rank_counts)
+
+    def has_pair(self) -> bool:
+        return self.max_of_a_kind() >= 2
+
+    def has_flush(self, size: int = 5) -> bool:
+        return max(self.suit_counts) >= size
+
+    def has_flush_draw(self, size: int = 5) -> bool:
+        """Return True if one more card of some suit would complete a ``size``-card flush."""
+        return max(self.suit_counts) >= size - 1
+
+    def has_straight(self, size: int = 5) -> bool:
+        return self._longest_run_window(size) >= size
+
+    def has_straight_draw(self, size: int = 5) -> bool:
+        """Return True if one more card could complete a ``size``-card straight."""
+        return self._longest_run_window(size) >= size - 1
+
+    def best_hand(self, size: int = 5) -> Optional[Tuple[List[Card], Tuple[int, List[int]]]]:
+        """Return the strongest ``size``-card hand the player holds and its evaluation."""
+        return PokerHand.best(self.hand, size, self.rank_counts, self.suit_counts)
+
+    def _longest_run_window(self, size: int) -> int:
+        """Return the most values held within any window of ``size`` consecutive values."""
+        values = self.suit_masks[0] | self.suit_masks[1] | self.suit_masks[2] | self.suit_masks[3]
+        window = (1 << size) - 1
+        return max(((values >> low) & window).bit_count() for low in range(2, 16 - size))
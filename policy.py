@@ -0,0 +1,150 @@
+from abc import ABC, abstractmethod
+from typing import List, Optional
+import random
+from game import Game, Action
+from player import Player
+from physical import Card
+from hand import PokerHand
+
+class Policy(ABC):
+    """
+    Abstract base class for automated players.
+
+    A policy answers every decision the game asks of a player, given the game
+    state. Policies never perform I/O, so they can drive headless games.
+
+    Attributes:
+        rng (random.Random): The random number generator used for the policy's choices.
+    """
+
+    def __init__(self, rng: Optional[random.Random] = None):
+        self.rng = rng if rng is not None else random.Random()
+
+    @abstractmethod
+    def choose_action(self, game: Game, player: Player) -> Action:
+        pass
+
+    @abstractmethod
+    def choose_card_from_hand(self, game: Game, player: Player) -> Card:
+        pass
+
+    @abstractmethod
+    def choose_card_from_treasure(self, game: Game, player: Player) -> Card:
+        pass
+
+    @abstractmethod
+    def choose_opponent(self, game: Game, player: Player, opponents: List[Player]) -> Player:
+        pass
+
+    @abstractmethod
+    def choose_challenge_size(self, game: Game, player: Player, max_size: int) -> int:
+        pass
+
+    @abstractmethod
+    def choose_cards(self, game: Game, player: Player, num_cards: int) -> List[Card]:
+        pass
+
+    @abstractmethod
+    def choose_draw_source(self, game: Game, player: Player) -> str:
+        pass
+
+    def observe_reveal(self, game: Game, player: Player, cards: List[Card]):
+        """Called when ``player`` reveals ``cards`` from their hand in a challenge."""
+        pass
+
+class RandomPolicy(Policy):
+    """
+    A policy that picks uniformly among the available actions and cards.
+    """
+
+    def choose_action(self, game: Game, player: Player) -> Action:
+        actions = game.available_actions(player)
+        return self.rng.choice(actions) if actions else Action.DECK
+
+    def choose_card_from_hand(self, game: Game, player: Player) -> Card:
+        return self.rng.choice(player.hand)
+
+    def choose_card_from_treasure(self, game: Game, player: Player) -> Card:
+        return self.rng.choice(game.treasure_deck)
+
+    def choose_opponent(self, game: Game, player: Player, opponents: List[Player]) -> Player:
+        return self.rng.choice(opponents)
+
+    def choose_challenge_size(self, game: Game, player: Player, max_size: int) -> int:
+        return self.rng.randint(3, max_size)
+
+    def choose_cards(self, game: Game, player: Player, num_cards: int) -> List[Card]:
+        return self.rng.sample(player.hand, num_cards)
+
+    def choose_draw_source(self, game: Game, player: Player) -> str:
+        return self.rng.choice(('treasure', 'main'))
+
+class GreedyPolicy(Policy):
+    """
+    A policy that plays the strongest hands it holds.
+
+    It stores any 5-card hand better than a high card, challenges with its
+    strongest hand once that reaches ``challenge_threshold``, and otherwise draws
+    or swaps for treasure cards that pair up with its hand.
+
+    Attributes:
+        challenge_threshold (int): The lowest hand rank the policy challenges with.
+    """
+
+    def __init__(self, rng: Optional[random.Random] = None, challenge_threshold: int = PokerHand.TWO_PAIR):
+        super().__init__(rng)
+        self.challenge_threshold = challenge_threshold
+
+    def choose_action(self, game: Game, player: Player) -> Action:
+        actions = game.available_actions(player)
+        if not actions:
+            return Action.DECK
+
+        if Action.STORE in actions and player.has_pair() and player.best_hand(5)[1][0] > PokerHand.HIGH_CARD:
+            return Action.STORE
+        if Action.CHALLENGE in actions and self._challenge_rank(game, player) >= self.challenge_threshold:
+            return Action.CHALLENGE
+        if Action.TREASURE in actions and self._treasure_match(game, player) is not None:
+            return Action.TREASURE
+        if Action.DECK in actions:
+            return Action.DECK
+        return self.rng.choice(actions)
+
+    def choose_card_from_hand(self, game: Game, player: Player) -> Card:
+        return self._weakest_card(player)
+
+    def choose_card_from_treasure(self, game: Game, player: Player) -> Card:
+        match = self._treasure_match(game, player)
+        if match is not None:
+            return match
+        return max(game.treasure_deck, key=lambda card: card.value)
+
+    def choose_opponent(self, game: Game, player: Player, opponents: List[Player]) -> Player:
+        return min(opponents, key=lambda opponent: len(opponent.hand))
+
+    def choose_challenge_size(self, game: Game, player: Player, max_size: int) -> int:
+        best = PokerHand.best_subsets(player.hand)
+        return max(range(3, max_size + 1), key=lambda size: best[size][1])
+
+    def choose_cards(self, game: Game, player: Player, num_cards: int) -> List[Card]:
+        return player.best_hand(num_cards)[0]
+
+    def choose_draw_source(self, game: Game, player: Player) -> str:
+        # Treasure draws always take the oldest treasure card.
+        if game.treasure_deck and player.rank_counts[game.treasure_deck[0].value]:
+            return 'treasure'
+        return 'main'
+
+    def _challenge_rank(self, game: Game, player: Player) -> int:
+        max_size = min(len(player.hand), 5)
+        return max(player.best_hand(size)[1][0] for size in range(3, max_size + 1))
+
+    def _treasure_match(self, game: Game, player: Player) -> Optional[Card]:
+        """Return the highest treasure card sharing a rank with the player's hand, if any."""
+        matches = [card for card in game.treasure_deck if player.rank_counts[card.value]]
+        return max(matches, key=lambda card: card.value) if matches else None
+
+    def _weakest_card(self, player: Player) -> Card:
+        """Return the lowest card that does not share its rank with another card in hand."""
+        counts = player.rank_counts
+        return min(player.hand, key=lambda card: (counts[card.value] > 1, card.value))
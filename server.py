@@ -0,0 +1,418 @@
+"""
+Asyncio server hosting many Dragons Hoard tables in one process.
+
+Clients speak newline-delimited JSON over TCP or a Unix socket. A client joins a
+table with ``{"type": "join", "table": "<id>", "name": "<player>", "players": 2}``;
+the table starts once it has ``players`` seats (2-MAX_SEATS, set by its first client).
+A client that disconnects before then gives up its seat, and a table left empty is closed.
+The server then sends:
+
+- ``{"type": "seated", "table": ..., "seat": i, "players": [names]}`` when the game starts,
+- ``{"type": "event", "method": ..., "args": [...]}`` for every interface notification,
+- ``{"type": "decision", "id": n, "kind": ..., "args": [...], "hand": [uids]}`` when the
+  client's player must decide, with ``kind`` naming the ``UserInterface`` method that
+  would answer it (action decisions also list the available ``actions``); the client
+  replies ``{"type": "answer", "id": n, "value": ...}``,
+- ``{"type": "error", "message": ...}`` after an invalid message or answer (the decision is
+  then asked again),
+- ``{"type": "over", "winner": name}`` at the end of the game.
+
+Cards are sent and answered as card uids (``Card.uid``), players as seat indices, actions as
+their letters ('D', 'T', 'C', 'S') and draw sources as 'treasure' or 'main'.
+A decision that is not answered in time, or whose seat has disconnected, is
+answered by a ``GreedyPolicy`` so the rest of the table can carry on.
+"""
+from itertools import count
+from typing import Any, Dict, List, Optional, Set
+import argparse
+import asyncio
+import json
+import random
+from game import Game, Action, DecisionKind, PendingDecision
+from player import Player
+from physical import Card, CardPile, card_of
+from ui import UserInterface
+from policy import Policy, GreedyPolicy
+
+# Bounds on what a client can make the server hold on its behalf.
+MAX_LINE = 4096
+BACKLOG = 4096
+INBOX_SIZE = 8
+MAX_SEATS = 30
+WRITE_BUFFER = 1 << 16
+
+def _encode(value: Any, players: List[Player]) -> Any:
+    if isinstance(value, Card):
+        return value.uid
+    if isinstance(value, Player):
+        return players.index(value)
+    if isinstance(value, Action):
+        return value.value
+    if isinstance(value, (list, tuple, CardPile)):
+        return [_encode(item, players) for item in value]
+    return value
+
+class Seat:
+    """
+    A player's connection to a table.
+
+    Attributes:
+        name (str): The player's name.
+        writer (asyncio.StreamWriter): The client's stream.
+        inbox (asyncio.Queue): Answers received from the client; bounded, so a client
+            that floods the server stops being read.
+        connected (bool): Whether the client is still connected.
+    """
+
+    def __init__(self, name: str, writer: asyncio.StreamWriter):
+        self.name = name
+        self.writer = writer
+        self.inbox: asyncio.Queue = asyncio.Queue(INBOX_SIZE)
+        self.connected = True
+
+    def write(self, message: Dict):
+        if self.connected:
+            self.writer.write(json.dumps(message, separators=(',', ':')).encode() + b'\n')
+
+    async def drain(self, timeout: float):
+        """Wait until the client has read enough, dropping it if that takes over ``timeout``."""
+        if not self.connected or self.writer.transport.get_write_buffer_size() < WRITE_BUFFER:
+            return
+        try:
+            await asyncio.wait_for(self.writer.drain(), timeout)
+        except (asyncio.TimeoutError, ConnectionError):
+            self.disconnect()
+
+    async def send(self, message: Dict, timeout: float):
+        self.write(message)
+        await self.drain(timeout)
+
+    def disconnect(self):
+        if self.connected:
+            self.connected = False
+            self.writer.close()
+            try:
+                self.inbox.put_nowait(None)
+            except asyncio.QueueFull:
+                pass
+
+class RemoteInterface(UserInterface):
+    """
+    User interface implementation that forwards a game to the clients at its table.
+
+    Notifications are encoded and queued for every seat (a player only ever sees
+    their own hand) and sent by ``flush``. Decisions cannot block, so they are not
+    answered through this interface: ``Table`` sends them with the step API.
+
+    Attributes:
+        seats (List[Seat]): The table's seats, in player order.
+        game (Game): The game being played.
+        outbox (List[List[Dict]]): The messages waiting to be sent to each seat.
+    """
+
+    def __init__(self, seats: List[Seat], game: Game):
+        self.seats = seats
+        self.game = game
+        self.outbox: List[List[Dict]] = [[] for _ in seats]
+
+    def _broadcast(self, method: str, *args):
+        message = {'type': 'event', 'method': method, 'args': _encode(args, self.game.players)}
+        for messages in self.outbox:
+            messages.append(message)
+
+    async def flush(self, timeout: float):
+        for seat, messages in zip(self.seats, self.outbox):
+            for message in messages:
+                seat.write(message)
+            messages.clear()
+        for seat in self.seats:
+            await seat.drain(timeout)
+
+    def display_game_state(self, game: Game):
+        for messages, player in zip(self.outbox, game.players):
+            messages.append({
+                'type': 'event',
+                'method': 'display_game_state',
+                'args': [{
+                    'current': game.current_player_index,
+                    'turn': game.turn,
+                    'deck': len(game.main_deck),
+                    'treasure': [card.uid for card in game.treasure_deck],
+                    'hand': [card.uid for card in player.hand],
+                    'hand_sizes': [len(other.hand) for other in game.players],
+                    'stored': [len(other.stored_hands) for other in game.players],
+                }],
+            })
+
+    def display_challenge_result(self, challenger: Player, opponent: Player, winner: Player):
+        self._broadcast('display_challenge_result', challenger, opponent, winner)
+
+    def display_winner(self, winner: Player):
+        self._broadcast('display_winner', winner)
+
+    def display_message(self, message: str):
+        self._broadcast('display_message', message)
+
+    def get_player_action(self, player: Player) -> Action:
+        raise RuntimeError("Remote decisions are answered asynchronously by Table.")
+
+    def get_card_from_hand(self, player: Player) -> Card:
+        raise RuntimeError("Remote decisions are answered asynchronously by Table.")
+
+    def get_card_from_treasure(self, treasure_deck: List[Card]) -> Card:
+        raise RuntimeError("Remote decisions are answered asynchronously by Table.")
+
+    def select_opponent(self, player: Player, opponents: List[Player]) -> Player:
+        raise RuntimeError("Remote decisions are answered asynchronously by Table.")
+
+    def get_challenge_hand_size(self, max_size: int) -> int:
+        raise RuntimeError("Remote decisions are answered asynchronously by Table.")
+
+    def select_cards(self, player: Player, num_cards: int) -> List[Card]:
+        raise RuntimeError("Remote decisions are answered asynchronously by Table.")
+
+    def choose_draw_source(self) -> str:
+        raise RuntimeError("Remote decisions are answered asynchronously by Table.")
+
+class Table:
+    """
+    One game between remote players, driven with ``Game.start``/``Game.step``.
+
+    Attributes:
+        name (str): The table id clients join with.
+        size (int): The number of seats.
+        seats (List[Seat]): The seats taken so far.
+        decision_timeout (float): Seconds a player has to answer a decision (and a
+            client to read pending messages) before the fallback policy takes over.
+        max_turns (Optional[int]): The turn limit of the game.
+        fallback (Policy): The policy answering for slow or disconnected players.
+        decisions (int): The number of decisions answered so far.
+        timeouts (int): The number of decisions answered by the fallback policy.
+    """
+
+    def __init__(self, name: str, size: int, decision_timeout: float = 30.0, max_turns: Optional[int] = 500, fallback: Optional[Policy] = None):
+        self.name = name
+        self.size = size
+        self.seats: List[Seat] = []
+        self.decision_timeout = decision_timeout
+        self.max_turns = max_turns
+        self.fallback = fallback or GreedyPolicy()
+        self.decisions = 0
+        self.timeouts = 0
+        self._ids = count()
+
+    @property
+    def full(self) -> bool:
+        return len(self.seats) == self.size
+
+    async def run(self) -> Optional[str]:
+        """Play the game to the end and return the winner's name."""
+        game = Game([seat.name for seat in self.seats], rng=random.Random())
+        interface = RemoteInterface(self.seats, game)
+        names = [seat.name for seat in self.seats]
+        for index, seat in enumerate(self.seats):
+            await seat.send({'type': 'seated', 'table': self.name, 'seat': index, 'players': names}, self.decision_timeout)
+
+        decision = game.start(self.max_turns)
+        while decision is not None:
+            self._deliver(interface, decision.events)
+            await interface.flush(self.decision_timeout)
+            decision = await self._resolve(game, decision)
+        self._deliver(interface, game.drain_events())
+        await interface.flush(self.decision_timeout)
+
+        winner = game.winner.name if game.winner else None
+        for seat in self.seats:
+            await seat.send({'type': 'over', 'winner': winner}, self.decision_timeout)
+            seat.disconnect()
+        return winner
+
+    def _deliver(self, interface: RemoteInterface, events):
+        for method, args in events:
+            getattr(interface, method)(*args)
+
+    async def _resolve(self, game: Game, decision: PendingDecision) -> Optional[PendingDecision]:
+        """Get a valid answer to ``decision`` and play it."""
+        self.decisions += 1
+        seat = self.seats[game.players.index(decision.player)]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.decision_timeout
+        message = {
+            'type': 'decision',
+            'id': next(self._ids),
+            'kind': decision.kind.value,
+            'args': _encode(decision.args, game.players),
+            'hand': [card.uid for card in decision.player.hand],
+        }
+        if decision.kind is DecisionKind.ACTION:
+            message['actions'] = [action.value for action in game.available_actions(decision.player)]
+        while seat.connected:
+            await seat.send(message, self.decision_timeout)
+            reply = await self._receive(seat, message['id'], deadline - loop.time())
+            if reply is None:
+                break
+            try:
+                return game.step(self._decode(game, decision, reply.get('value')))
+            except (ValueError, TypeError, IndexError, KeyError) as error:
+                await seat.send({'type': 'error', 'message': str(error)}, self.decision_timeout)
+
+        self.timeouts += 1
+        return game.step(self._fallback_answer(game, decision))
+
+    async def _receive(self, seat: Seat, decision_id: int, timeout: float) -> Optional[Dict]:
+        """Wait for the answer to ``decision_id``, skipping stale ones; None on timeout or disconnect."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            try:
+                reply = await asyncio.wait_for(seat.inbox.get(), max(deadline - loop.time(), 0))
+            except asyncio.TimeoutError:
+                return None
+            if reply is None or reply.get('id') == decision_id:
+                return reply
+
+    def _decode(self, game: Game, decision: PendingDecision, value: Any) -> Any:
+        kind = decision.kind
+        if kind is DecisionKind.ACTION:
+            return Action(value)
+        if kind in (DecisionKind.CARD_FROM_HAND, DecisionKind.CARD_FROM_TREASURE):
+            return self._card(game, value)
+        if kind is DecisionKind.OPPONENT:
+            return game.players[value]
+        if kind is DecisionKind.CARDS:
+            return [self._card(game, uid) for uid in value]
+        return value
+
+    def _card(self, game: Game, uid: int) -> Card:
+        if not 0 <= uid < 52 * game.main_deck.decks:
+            raise ValueError(f"No card {uid} in this game")
+        return card_of(uid)
+
+    def _fallback_answer(self, game: Game, decision: PendingDecision) -> Any:
+        kind, player, policy = decision.kind, decision.player, self.fallback
+        if kind is DecisionKind.ACTION:
+            return policy.choose_action(game, player)
+        if kind is DecisionKind.CARD_FROM_HAND:
+            return policy.choose_card_from_hand(game, player)
+        if kind is DecisionKind.CARD_FROM_TREASURE:
+            return policy.choose_card_from_treasure(game, player)
+        if kind is DecisionKind.OPPONENT:
+            return policy.choose_opponent(game, player, decision.args[1])
+        if kind is DecisionKind.CHALLENGE_SIZE:
+            return policy.choose_challenge_size(game, player, decision.args[0])
+        if kind is DecisionKind.CARDS:
+            return policy.choose_cards(game, player, decision.args[1])
+        return policy.choose_draw_source(game, player)
+
+class Server:
+    """
+    Accepts clients, seats them at tables and runs every table as its own task.
+
+    Attributes:
+        decision_timeout (float): The decision timeout of new tables.
+        join_timeout (float): Seconds a new client has to send its join message.
+        max_turns (Optional[int]): The turn limit of new tables.
+        lobby (Dict[str, Table]): Tables waiting for players, by id.
+        tables (Dict[str, Table]): Tables being played, by id.
+        games_played (int): The number of finished games.
+        tasks (Set[asyncio.Task]): The tasks running the tables being played; the event
+            loop only keeps weak references to tasks.
+    """
+
+    def __init__(self, decision_timeout: float = 30.0, join_timeout: float = 30.0, max_turns: Optional[int] = 500):
+        self.decision_timeout = decision_timeout
+        self.join_timeout = join_timeout
+        self.max_turns = max_turns
+        self.lobby: Dict[str, Table] = {}
+        self.tables: Dict[str, Table] = {}
+        self.games_played = 0
+        self.tasks: Set[asyncio.Task] = set()
+
+    async def start_tcp(self, host: str = '127.0.0.1', port: int = 8765) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self.handle_client, host, port, limit=MAX_LINE, backlog=BACKLOG)
+
+    async def start_unix(self, path: str) -> asyncio.AbstractServer:
+        return await asyncio.start_unix_server(self.handle_client, path, limit=MAX_LINE, backlog=BACKLOG)
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            join = json.loads(await asyncio.wait_for(reader.readline(), self.join_timeout))
+            seat = self._join(join, writer)
+        except (asyncio.TimeoutError, ValueError, TypeError, KeyError, AttributeError) as error:
+            writer.write(json.dumps({'type': 'error', 'message': f"Invalid join: {error}"}).encode() + b'\n')
+            writer.close()
+            return
+
+        try:
+            while seat.connected:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    await seat.send({'type': 'error', 'message': "Invalid JSON."}, self.decision_timeout)
+                    continue
+                if isinstance(message, dict) and message.get('type') == 'answer':
+                    # Blocks while the inbox is full, which stops reading from the client.
+                    await seat.inbox.put(message)
+        except (ConnectionError, ValueError):
+            # ValueError: a line longer than MAX_LINE.
+            pass
+        finally:
+            seat.disconnect()
+            self._leave_lobby(join['table'], seat)
+
+    def _join(self, join: Dict, writer: asyncio.StreamWriter) -> Seat:
+        if join.get('type') != 'join':
+            raise ValueError("expected a join message")
+        name = join['table']
+        table = self.lobby.get(name)
+        if table is None:
+            size = int(join.get('players', 2))
+            if not 2 <= size <= MAX_SEATS or name in self.tables:
+                raise ValueError(f"cannot open table {name!r} for {size} players")
+            table = self.lobby[name] = Table(name, size, self.decision_timeout, self.max_turns)
+        seat = Seat(str(join['name']), writer)
+        table.seats.append(seat)
+        if table.full:
+            del self.lobby[name]
+            self.tables[name] = table
+            task = asyncio.create_task(self._play(table))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+        return seat
+
+    def _leave_lobby(self, name: str, seat: Seat):
+        """Free ``seat`` if its table has not started, and close the table if that empties it."""
+        table = self.lobby.get(name)
+        if table is None or seat not in table.seats:
+            return
+        table.seats.remove(seat)
+        if not table.seats:
+            del self.lobby[name]
+
+    async def _play(self, table: Table):
+        try:
+            await table.run()
+        finally:
+            self.games_played += 1
+            del self.tables[table.name]
+
+async def main(args: argparse.Namespace):
+    server = Server(args.decision_timeout, max_turns=args.max_turns)
+    listener = await (server.start_unix(args.unix) if args.unix else server.start_tcp(args.host, args.port))
+    async with listener:
+        await listener.serve_forever()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Host Dragons Hoard tables for remote clients.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help="Listen on this Unix socket path instead of TCP.")
+    parser.add_argument('--decision-timeout', type=float, default=30.0)
+    parser.add_argument('--max-turns', type=int, default=500)
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,227 @@
+from typing import List, Tuple
+from game import Game, Action
+from physical import Card, card_of
+from hand import PokerHand
+
+# Compact actions, with cards as their uids (``Card.uid``):
+#   (Action.DECK,)
+#   (Action.TREASURE, hand_code, treasure_code)
+#   (Action.CHALLENGE, opponent_index, challenger_mask, opponent_mask, sources)
+#   (Action.STORE, mask)
+# ``sources`` holds one 'T' (treasure) or 'M' (main) per card the challenge winner
+# draws; the last one is repeated if the winner draws more cards than listed.
+StateAction = Tuple
+
+def cards_of(mask: int) -> List[Card]:
+    """Return the cards whose bits are set in ``mask``."""
+    cards = []
+    while mask:
+        low = mask & -mask
+        cards.append(card_of(low.bit_length() - 1))
+        mask ^= low
+    return cards
+
+def mask_of(cards: List[Card]) -> int:
+    """Return the card set of ``cards`` as a bitmask."""
+    mask = 0
+    for card in cards:
+        mask |= card.mask
+    return mask
+
+class GameState:
+    """
+    A compact, UserInterface-free snapshot of a game for tree search.
+
+    Hands and stored hands are bitmasks of card uids, and the decks are short
+    buffers of uids, so ``clone`` copies a handful of small objects. ``apply``
+    plays a compact action with the same rules as the ``Game.handle_*`` methods
+    and records just enough to restore the previous state with ``undo``.
+
+    Attributes:
+        deck (bytearray): The uids of the cards in the main deck, top of the deck last
+            (an ``array('H')`` for shoes of more than 4 decks, as in ``Deck``).
+        treasure (List[int]): The uids of the cards in the treasure deck, oldest first.
+        hands (List[int]): The hand of each player, as a bitmask.
+        stored (List[Tuple[int, ...]]): The stored hands of each player, as bitmasks.
+        current (int): The index of the player to move.
+        turn (int): The number of turns played so far.
+    """
+
+    __slots__ = ('deck', 'treasure', 'hands', 'stored', 'current', 'turn', '_history')
+
+    def __init__(self, deck: bytearray, treasure: List[int], hands: List[int], stored: List[Tuple[int, ...]], current: int = 0, turn: int = 0):
+        self.deck = deck
+        self.treasure = treasure
+        self.hands = hands
+        self.stored = stored
+        self.current = current
+        self.turn = turn
+        self._history = []
+
+    @classmethod
+    def from_game(cls, game: Game) -> 'GameState':
+        return cls(
+            game.main_deck.codes[:],
+            [card.uid for card in game.treasure_deck],
+            [player.mask for player in game.players],
+            [tuple(mask_of(hand) for hand in player.stored_hands) for player in game.players],
+            game.current_player_index,
+            game.turn,
+        )
+
+    def clone(self) -> 'GameState':
+        """Return an independent copy of the state, without its undo history."""
+        return GameState(self.deck[:], list(self.treasure), list(self.hands), list(self.stored), self.current, self.turn)
+
+    def hand_size(self, player: int) -> int:
+        return self.hands[player].bit_count()
+
+    def apply(self, action: StateAction) -> bool:
+        """
+        Play ``action`` for the current player and pass the turn.
+
+        As in ``Game.play``, the turn passes even if the action fails.
+
+        Returns:
+            bool: True if the action succeeded, False otherwise.
+        """
+        drawn = []
+        self._history.append((self.current, self.turn, tuple(self.treasure), list(self.hands), list(self.stored), drawn))
+
+        kind = action[0]
+        if kind is Action.DECK:
+            success = self._deck(drawn)
+        elif kind is Action.TREASURE:
+            success = self._treasure(action[1], action[2], drawn)
+        elif kind is Action.CHALLENGE:
+            success = self._challenge(action[1], action[2], action[3], action[4], drawn)
+        elif kind is Action.STORE:
+            success = self._store(action[1])
+        else:
+            success = False
+
+        self.current = (self.current + 1) % len(self.hands)
+        self.turn += 1
+        return success
+
+    def undo(self):
+        """Restore the state from before the most recent ``apply``."""
+        self.current, self.turn, treasure, self.hands, self.stored, drawn = self._history.pop()
+        self.treasure = list(treasure)
+        self.deck.extend(reversed(drawn))
+
+    def _draw(self, drawn: List[int]) -> int:
+        code = self.deck.pop()
+        drawn.append(code)
+        return code
+
+    def _deck(self, drawn: List[int]) -> bool:
+        player = self.current
+        if self.hand_size(player) >= 13 or not self.deck:
+            return False
+        self.hands[player] |= 1 << self._draw(drawn)
+        return True
+
+    def _treasure(self, hand_code: int, treasure_code: int, drawn: List[int]) -> bool:
+        player = self.current
+        if not self.hands[player] >> hand_code & 1 or treasure_code not in self.treasure:
+            return False
+        self.hands[player] ^= (1 << hand_code) | (1 << treasure_code)
+        self.treasure.remove(treasure_code)
+        self.treasure.append(hand_code)
+        if self.deck:
+            self.treasure.append(self._draw(drawn))
+        return True
+
+    def _challenge(self, opponent: int, challenger_mask: int, opponent_mask: int, sources: str, drawn: List[int]) -> bool:
+        player = self.current
+        size = challenger_mask.bit_count()
+        if (
+            opponent == player
+            or self.hand_size(player) < 3
+            or self.hand_size(opponent) < 3
+            or not 3 <= size <= 5
+            or opponent_mask.bit_count() != size
+            or challenger_mask & ~self.hands[player]
+            or opponent_mask & ~self.hands[opponent]
+        ):
+            return False
+
+        challenger_rank = PokerHand(cards_of(challenger_mask)).strength() >> 20
+        opponent_rank = PokerHand(cards_of(opponent_mask)).strength() >> 20
+        winner, draws = (player, challenger_rank) if challenger_rank > opponent_rank else (opponent, opponent_rank)
+
+        for i in range(draws):
+            if self.hand_size(winner) >= 13:
+                break
+            source = sources[min(i, len(sources) - 1)]
+            if source == 'T' and self.treasure:
+                self.hands[winner] |= 1 << self.treasure.pop(0)
+                if self.deck:
+                    self.treasure.append(self._draw(drawn))
+            elif source == 'M' and self.deck:
+                self.hands[winner] |= 1 << self._draw(drawn)
+            else:
+                break
+        return True
+
+    def _store(self, mask: int) -> bool:
+        player = self.current
+        if mask.bit_count() != 5 or mask & ~self.hands[player]:
+            return False
+        if PokerHand(cards_of(mask)).strength() >> 20 <= PokerHand.HIGH_CARD:
+            return False
+        self.stored[player] = self.stored[player] + (mask,)
+        self.hands[player] &= ~mask
+        return True
+
+    def legal_actions(self) -> List[StateAction]:
+        """
+        Return the actions available to the current player under a compact abstraction.
+
+        Every treasure swap is listed. Challenges are listed per opponent and hand
+        size with both players using their strongest hand of that size, drawing
+        either only from the main deck or only from the treasure deck. Only the
+        strongest storable hand is listed.
+        """
+        player = self.current
+        hand = self.hands[player]
+        size = hand.bit_count()
+        actions = []
+
+        if size < 13 and self.deck:
+            actions.append((Action.DECK,))
+        if self.treasure:
+            for hand_card in cards_of(hand):
+                for treasure_code in self.treasure:
+                    actions.append((Action.TREASURE, hand_card.uid, treasure_code))
+        if size >= 3:
+            own = PokerHand.best_subsets(cards_of(hand))
+            for opponent, opponent_hand in enumerate(self.hands):
+                opponent_size = opponent_hand.bit_count()
+                if opponent == player or opponent_size < 3:
+                    continue
+                theirs = PokerHand.best_subsets(cards_of(opponent_hand))
+                for challenge_size in range(3, min(size, opponent_size, 5) + 1):
+                    challenger_mask = mask_of(own[challenge_size][0])
+                    opponent_mask = mask_of(theirs[challenge_size][0])
+                    actions.append((Action.CHALLENGE, opponent, challenger_mask, opponent_mask, 'M'))
+                    if self.treasure:
+                        actions.append((Action.CHALLENGE, opponent, challenger_mask, opponent_mask, 'T'))
+            if size >= 5 and own[5][1][0] > PokerHand.HIGH_CARD:
+                actions.append((Action.STORE, mask_of(own[5][0])))
+        return actions
+
+    def is_over(self) -> bool:
+        return not self.deck and not self.treasure and not any(self.hands)
+
+    def scores(self) -> List[int]:
+        """Return each player's best stored hand rank, as used by ``Game.determine_winner``."""
+        return [
+            max((PokerHand(cards_of(mask)).strength() >> 20 for mask in stored), default=0)
+            for stored in self.stored
+        ]
+
+    def key(self) -> Tuple:
+        """Return a hashable summary of the state, e.g. for transposition tables."""
+        return (bytes(self.deck), tuple(self.treasure), tuple(self.hands), tuple(self.stored), self.current)
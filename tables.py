@@ -0,0 +1,102 @@
+"""
+Versioned binary files of precomputed integer tables, loaded with ``mmap``.
+
+A table file holds named arrays of 64-bit integers. Loading maps the file
+read-only and returns ``memoryview`` objects straight over the mapping, so no
+table is copied into the process: pages are read on first use and shared by
+every process that maps the same file (e.g. forked or spawned workers).
+
+The file starts with MAGIC, the format VERSION, a byte-order marker and the number
+of tables, followed by one directory entry per table (name, offset and length)
+and the 8-byte aligned table data. Files written on a machine of the other byte
+order, or by another version, are ignored and rebuilt by their callers.
+"""
+from typing import Dict, Optional, Sequence
+import mmap
+import os
+import struct
+
+MAGIC = b'DHTAB\x00'
+VERSION = 1
+HEADER = struct.Struct('=6sHHI')
+ENTRY = struct.Struct('=16sQQ')
+BYTE_ORDER = 0x0102
+ITEM = 'q'
+
+def cache_directory() -> str:
+    """Return the directory of the on-disk caches (``$DRAGONS_HOARD_CACHE`` or ``~/.cache``)."""
+    return os.environ.get('DRAGONS_HOARD_CACHE') or os.path.join(os.path.expanduser('~'), '.cache', 'dragons-hoard')
+
+def table_path(name: str) -> str:
+    """Return the path of the table file ``name`` in the cache directory."""
+    return os.path.join(cache_directory(), f'{name}-v{VERSION}.bin')
+
+def save_tables(path: str, tables: Dict[str, Sequence[int]]) -> bool:
+    """
+    Write ``tables`` to ``path`` atomically.
+
+    Returns:
+        bool: True if the file was written; False if it could not be (e.g. a
+        read-only cache directory), in which case callers keep their in-memory tables.
+    """
+    size = struct.calcsize(ITEM)
+    offset = HEADER.size + ENTRY.size * len(tables)
+    offset += -offset % size
+    directory = []
+    for name, values in tables.items():
+        directory.append(ENTRY.pack(name.encode(), offset, len(values)))
+        offset += size * len(values)
+    data = bytearray(HEADER.pack(MAGIC, VERSION, BYTE_ORDER, len(tables)))
+    for entry in directory:
+        data += entry
+    data += bytes(-len(data) % size)
+    for values in tables.values():
+        data += struct.pack(f'={len(values)}{ITEM}', *values)
+
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f'{path}.{os.getpid()}.tmp'
+        with open(temporary, 'wb') as file:
+            file.write(data)
+        os.replace(temporary, path)
+    except OSError:
+        return False
+    return True
+
+def load_tables(path: str, expected: Optional[Dict[str, Optional[int]]] = None) -> Optional[Dict[str, memoryview]]:
+    """
+    Map the table file at ``path`` read-only.
+
+    Args:
+        path: The table file.
+        expected: The names of the tables the caller needs, with their lengths (None
+            for any length).
+
+    Returns:
+        Optional[Dict[str, memoryview]]: A read-only view of each table, indexable like
+        a list of ints; None if the file is missing, truncated, of another version or
+        byte order, or lacks an expected table or has one of another length.
+    """
+    try:
+        with open(path, 'rb') as file:
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    if len(mapping) < HEADER.size:
+        return None
+    magic, version, byte_order, count = HEADER.unpack_from(mapping)
+    if magic != MAGIC or version != VERSION or byte_order != BYTE_ORDER:
+        return None
+
+    view = memoryview(mapping)
+    size = struct.calcsize(ITEM)
+    tables = {}
+    for i in range(count):
+        name, offset, length = ENTRY.unpack_from(mapping, HEADER.size + ENTRY.size * i)
+        if offset % size or offset + size * length > len(mapping):
+            return None
+        tables[name.rstrip(b'\x00').decode()] = view[offset:offset + size * length].cast(ITEM)
+    for name, length in (expected or {}).items():
+        if name not in tables or length is not None and len(tables[name]) != length:
+            return None
+    return tables
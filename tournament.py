@@ -0,0 +1,157 @@
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import count
+from typing import Any, Callable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+import os
+import time
+from game import Action
+from policy import GreedyPolicy
+from headless import PolicyFactory, game_seed, play_game
+
+_ACTIONS = tuple(Action)
+
+class GameRecord(NamedTuple):
+    """
+    Compact result of one tournament game, as sent back by worker processes.
+
+    Attributes:
+        index (int): The index of the game within the tournament.
+        winner (int): The seat of the winning player.
+        turns (int): The number of turns played.
+        truncated (bool): Whether the game was stopped by the turn limit.
+        actions (Tuple[int, ...]): How often each action was chosen, in ``Action`` order.
+    """
+    index: int
+    winner: int
+    turns: int
+    truncated: bool
+    actions: Tuple[int, ...]
+
+class TournamentStats:
+    """
+    Aggregate results of a tournament, merged one game record at a time.
+
+    Attributes:
+        seats (int): The number of players at each table.
+        games (int): The number of games merged so far.
+        wins (List[int]): The number of games won by each seat.
+        turns (int): The total number of turns played.
+        truncated (int): The number of games stopped by the turn limit.
+        actions (Counter): The number of times each action was chosen.
+        elapsed (float): The wall-clock time taken, in seconds.
+    """
+
+    def __init__(self, seats: int):
+        self.seats = seats
+        self.games = 0
+        self.wins = [0] * seats
+        self.turns = 0
+        self.truncated = 0
+        self.actions = Counter()
+        self.elapsed = 0.0
+
+    def merge(self, record: GameRecord):
+        self.games += 1
+        self.wins[record.winner] += 1
+        self.turns += record.turns
+        self.truncated += record.truncated
+        for action, count in zip(_ACTIONS, record.actions):
+            self.actions[action] += count
+
+    @property
+    def win_rates(self) -> List[float]:
+        return [wins / self.games if self.games else 0.0 for wins in self.wins]
+
+    @property
+    def games_per_second(self) -> float:
+        return self.games / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        rates = ", ".join(f"seat {seat + 1}: {rate:.1%}" for seat, rate in enumerate(self.win_rates))
+        return f"{self.games} games in {self.elapsed:.2f}s ({self.games_per_second:.1f} games/s); {rates}"
+
+def play_games(seed: int, start: int, stop: int, policies: Sequence[PolicyFactory], max_turns: int) -> List[GameRecord]:
+    """Play games ``start`` to ``stop`` of a tournament and return their records."""
+    records = []
+    for index in range(start, stop):
+        game = play_game(game_seed(seed, index), policies, max_turns)
+        counts = game.interface.action_counts
+        records.append(GameRecord(
+            index,
+            game.players.index(game.winner),
+            game.turn,
+            not game.is_game_over(),
+            tuple(counts[action] for action in _ACTIONS),
+        ))
+    return records
+
+def run_chunks(worker: Callable[..., Any], n_games: Optional[int], chunk_size: int, workers: int, seed: int, *args) -> Iterator[Any]:
+    """
+    Split games 0 to ``n_games`` (or every game, if None) into chunks, run
+    ``worker(seed, start, stop, *args)`` on each in a pool of ``workers`` processes,
+    and yield the results as they complete.
+
+    At most two chunks per worker are in flight, so an unbounded run holds a
+    constant number of results.
+    """
+    chunks = count(0, chunk_size) if n_games is None else iter(range(0, n_games, chunk_size))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        def submit() -> bool:
+            first = next(chunks, None)
+            if first is None:
+                return False
+            stop = first + chunk_size if n_games is None else min(first + chunk_size, n_games)
+            pending.add(executor.submit(worker, seed, first, stop, *args))
+            return True
+
+        pending = set()
+        for _ in range(workers * 2):
+            if not submit():
+                break
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+                submit()
+
+def run_tournament(
+    n_games: int,
+    seed: int = 0,
+    policies: Sequence[PolicyFactory] = (GreedyPolicy, GreedyPolicy),
+    max_turns: int = 500,
+    workers: Optional[int] = None,
+    chunk_size: int = 64,
+    on_record: Optional[Callable[[GameRecord], None]] = None,
+) -> TournamentStats:
+    """
+    Play a tournament of headless games across a pool of worker processes.
+
+    Every game is seeded from ``seed`` and its index alone, so results do not depend
+    on the number of workers or the order in which chunks finish. Only a bounded
+    number of chunks is in flight at once, and their records are merged as soon as
+    they arrive.
+
+    Args:
+        n_games (int): The number of games to play.
+        seed (int): The tournament seed.
+        policies (Sequence[PolicyFactory]): One picklable policy factory per seat.
+        max_turns (int): The turn limit after which a game is scored as it stands.
+        workers (Optional[int]): The number of worker processes; defaults to the CPU count.
+        chunk_size (int): The number of games each worker plays per task.
+        on_record (Optional[Callable[[GameRecord], None]]): Called with every game record
+            as it is merged.
+
+    Returns:
+        TournamentStats: The merged results.
+    """
+    workers = workers or os.cpu_count() or 1
+    stats = TournamentStats(len(policies))
+
+    start = time.perf_counter()
+    for records in run_chunks(play_games, n_games, chunk_size, workers, seed, policies, max_turns):
+        for record in records:
+            stats.merge(record)
+            if on_record is not None:
+                on_record(record)
+    stats.elapsed = time.perf_counter() - start
+    return stats
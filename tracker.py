@@ -0,0 +1,278 @@
+from math import comb
+from typing import List
+from game import Recorder
+from physical import Card, card_of
+
+class ObserverModel:
+    """
+    What one player knows about the cards, and a model of the opponents' hidden cards.
+
+    Card sets are bitmasks of card uids (``Card.mask``). Every card the observer has
+    not seen is in ``unseen``, the pool the hidden cards of the opponents' hands (and
+    the main deck) are drawn from; without anything else to go on, each opponent's
+    hidden cards are a uniformly random subset of the pool of their size. The pool
+    is kept as per-value and per-suit counts, updated with every event, so queries
+    only combine those counts.
+
+    Attributes:
+        observer (int): The index of the observing player.
+        own (int): The observer's hand.
+        known (List[int]): For each player, the cards known to be in their hand
+            (the whole hand for the observer).
+        moved (List[int]): For each player, the cards seen leaving their hand: swapped
+            into the treasure deck or stored.
+        hidden (List[int]): For each player, the number of cards in their hand the
+            observer has not seen (0 for the observer).
+        unseen (int): The cards the observer has not seen.
+    """
+
+    def __init__(self, observer: int, players: int, cards: int):
+        self.observer = observer
+        self.own = 0
+        self.known = [0] * players
+        self.moved = [0] * players
+        self.hidden = [0] * players
+        self.unseen = (1 << cards) - 1
+        self._pool_size = cards
+        self._pool_values = [0] * 15
+        self._pool_suits = [0] * 4
+        self._known_values = [[0] * 15 for _ in range(players)]
+        self._known_suits = [[0] * 4 for _ in range(players)]
+        self._cache = {}
+        for uid in range(cards):
+            card = card_of(uid)
+            self._pool_values[card.value] += 1
+            self._pool_suits[card.code // 13] += 1
+        _binomial_rows(max(self._pool_suits))
+
+    @property
+    def pool_size(self) -> int:
+        """The number of cards the observer has not seen."""
+        return self._pool_size
+
+    def hand_size(self, player: int) -> int:
+        return self.known[player].bit_count() + self.hidden[player]
+
+    # Updates, driven by CardTracker.
+
+    def _hide(self, player: int):
+        """``player`` drew a card the observer did not see."""
+        self.hidden[player] += 1
+        self._cache.clear()
+
+    def _see(self, card: Card):
+        """Take ``card`` out of the unseen pool, if it is still in it."""
+        self._cache.clear()
+        if self.unseen & card.mask:
+            self.unseen ^= card.mask
+            self._pool_size -= 1
+            self._pool_values[card.value] -= 1
+            self._pool_suits[card.code // 13] -= 1
+
+    def _gain(self, player: int, card: Card):
+        """``card`` entered ``player``'s hand in view."""
+        self._see(card)
+        self.known[player] |= card.mask
+        self._known_values[player][card.value] += 1
+        self._known_suits[player][card.code // 13] += 1
+
+    def _lose(self, player: int, card: Card):
+        """``card`` left ``player``'s hand in view."""
+        self._cache.clear()
+        if self.known[player] & card.mask:
+            self.known[player] ^= card.mask
+            self._known_values[player][card.value] -= 1
+            self._known_suits[player][card.code // 13] -= 1
+        else:
+            self._see(card)
+            self.hidden[player] -= 1
+        if player != self.observer:
+            self.moved[player] |= card.mask
+
+    def _reveal(self, player: int, card: Card):
+        """``card`` was shown from ``player``'s hand and stays there."""
+        if not self.known[player] & card.mask:
+            self.hidden[player] -= 1
+            self._gain(player, card)
+
+    # Queries. Results are memoized until the next update.
+
+    def card_probability(self, player: int, card: Card) -> float:
+        """Return the probability that ``player`` holds ``card``."""
+        if self.known[player] & card.mask:
+            return 1.0
+        if not self.unseen & card.mask or not self._pool_size:
+            return 0.0
+        return self.hidden[player] / self._pool_size
+
+    def p_of_a_kind(self, player: int, copies: int) -> float:
+        """
+        Return the probability that ``player`` holds at least ``copies`` cards of some
+        value: 2 for a pair (or better), 3 for three of a kind, 4 for four of a kind.
+        """
+        key = ('kind', player, copies)
+        found = self._cache.get(key)
+        if found is None:
+            found = self._cache[key] = self._at_least(player, copies, self._known_values[player], self._pool_values)
+        return found
+
+    def p_pair(self, player: int) -> float:
+        """Return the probability that ``player`` holds a pair (or better) of some value."""
+        return self.p_of_a_kind(player, 2)
+
+    def p_flush(self, player: int, size: int = 5) -> float:
+        """Return the probability that ``player`` holds at least ``size`` cards of one suit."""
+        key = ('flush', player, size)
+        found = self._cache.get(key)
+        if found is None:
+            found = self._cache[key] = self._at_least(player, size, self._known_suits[player], self._pool_suits)
+        return found
+
+    def p_two_pair(self, player: int) -> float:
+        """Return the probability that ``player`` holds pairs (or better) of two values."""
+        key = ('two pair', player)
+        found = self._cache.get(key)
+        if found is not None:
+            return found
+        known = self._known_values[player]
+        hidden = self.hidden[player]
+        pairs = sum(count >= 2 for count in known)
+        if pairs >= 2:
+            found = 1.0
+        elif hidden <= 0:
+            found = 0.0
+        else:
+            # The hidden hands leaving no paired value, and exactly one, counting the
+            # known cards.
+            none = [1 - pairs] + [0] * hidden
+            one = [pairs] + [0] * hidden
+            for value in range(2, 15):
+                pool = self._pool_values[value]
+                if not pool:
+                    continue
+                row = _BINOMIAL[pool]
+                # The fewest hidden cards of this value that pair it (never, if it
+                # already is).
+                first = max(2 - known[value], 1) if known[value] < 2 else pool + 1
+                for total in range(hidden, 0, -1):
+                    top = min(pool, total)
+                    stay_none = 0
+                    stay_one = 0
+                    for j in range(1, min(first - 1, top) + 1):
+                        stay_none += none[total - j] * row[j]
+                        stay_one += one[total - j] * row[j]
+                    paired = 0
+                    for j in range(first, top + 1):
+                        paired += none[total - j] * row[j]
+                    none[total] += stay_none
+                    one[total] += stay_one + paired
+            found = 1.0 - (none[hidden] + one[hidden]) / comb(self._pool_size, hidden)
+        self._cache[key] = found
+        return found
+
+    def _at_least(self, player: int, copies: int, known: List[int], pools: List[int]) -> float:
+        """Return the probability that some group (value or suit) holds at least ``copies`` cards."""
+        if max(known) >= copies:
+            return 1.0
+        hidden = self.hidden[player]
+        if hidden <= 0:
+            return 0.0
+        # ways[total]: the hidden hands of ``total`` cards that keep every group below
+        # ``copies``, built one group at a time.
+        ways = [1] + [0] * hidden
+        for group, pool in enumerate(pools):
+            limit = min(pool, copies - 1 - known[group])
+            if limit <= 0:
+                continue
+            if limit == 1:
+                for total in range(hidden, 0, -1):
+                    ways[total] += ways[total - 1] * pool
+                continue
+            row = _BINOMIAL[pool]
+            for total in range(hidden, 0, -1):
+                count = ways[total]
+                for j in range(1, min(limit, total) + 1):
+                    count += ways[total - j] * row[j]
+                ways[total] = count
+        return 1.0 - ways[hidden] / comb(self._pool_size, hidden)
+
+# _BINOMIAL[n][k] is comb(n, k), for the card counts of a value or suit in a shoe.
+_BINOMIAL: List[List[int]] = []
+
+def _binomial_rows(n: int) -> None:
+    while len(_BINOMIAL) <= n:
+        size = len(_BINOMIAL)
+        _BINOMIAL.append([comb(size, k) for k in range(size + 1)])
+
+class CardTracker(Recorder):
+    """
+    Tracks the public information of a game for every player at once.
+
+    The tracker is a game recorder (see ``Game.add_recorder``): the engine reports
+    every card movement to it as it happens, and it updates one ``ObserverModel``
+    per player with what that player can see. Draws from the main deck are only
+    seen by the drawing player; everything else (the treasure deck, swaps, treasure
+    draws, revealed challenge hands and stored hands) is seen by everyone.
+
+    Attributes:
+        models (List[ObserverModel]): The model of each player, by seat.
+    """
+
+    def __init__(self):
+        self.models: List[ObserverModel] = []
+
+    def attach(self, game) -> 'CardTracker':
+        """Track ``game`` from its setup on; call before ``play`` or ``start``."""
+        game.add_recorder(self)
+        return self
+
+    def model(self, observer: int) -> ObserverModel:
+        return self.models[observer]
+
+    # Called by Game.
+
+    def start(self, game):
+        players = len(game.players)
+        self.models = [ObserverModel(observer, players, 52 * game.main_deck.decks) for observer in range(players)]
+
+    def draw(self, player: int, uid: int):
+        card = card_of(uid)
+        for model in self.models:
+            if model.observer == player:
+                model.own |= card.mask
+                model._gain(player, card)
+            else:
+                model._hide(player)
+
+    def refill(self, uid: int):
+        card = card_of(uid)
+        for model in self.models:
+            model._see(card)
+
+    def swap(self, player: int, hand_uid: int, treasure_uid: int):
+        self._leave(player, hand_uid)
+        self.take_treasure(player, treasure_uid)
+
+    def take_treasure(self, player: int, uid: int):
+        card = card_of(uid)
+        for model in self.models:
+            if model.observer == player:
+                model.own |= card.mask
+            model._gain(player, card)
+
+    def store(self, player: int, uids):
+        for uid in uids:
+            self._leave(player, uid)
+
+    def reveal(self, player: int, uids):
+        for uid in uids:
+            card = card_of(uid)
+            for model in self.models:
+                model._reveal(player, card)
+
+    def _leave(self, player: int, uid: int):
+        card = card_of(uid)
+        for model in self.models:
+            if model.observer == player:
+                model.own &= ~card.mask
+            model._lose(player, card)
@@ -0,0 +1,370 @@
+from itertools import combinations
+from typing import Dict, Optional, Tuple
+import numpy as np
+from deals import shuffled_decks
+from hand import PokerHand
+
+N_CARDS = 52
+HAND_LIMIT = 13
+DEAL_SIZE = 7
+TREASURE_SIZE = 9
+
+DECK_ACTION = 0
+TREASURE_START = 1
+CHALLENGE_START = TREASURE_START + N_CARDS * N_CARDS
+
+_COMBINATIONS: Dict[Tuple[int, int], np.ndarray] = {}
+
+def _combinations(n: int, size: int) -> np.ndarray:
+    if (n, size) not in _COMBINATIONS:
+        _COMBINATIONS[n, size] = np.array(list(combinations(range(n), size)), dtype=np.intp).reshape(-1, size)
+    return _COMBINATIONS[n, size]
+
+class VectorGame:
+    """
+    K independent Dragons Hoard games (2-3 players, one deck) advanced in lockstep.
+
+    The whole state lives in preallocated NumPy arrays that ``step`` updates in
+    place; ``observations`` and ``action_mask`` are views of them. The work done for
+    every game on every step (the legality lookup, the turn advance, the end check
+    and the action masks) runs in preallocated scratch buffers. Applying the actions
+    is not allocation-free: each action kind allocates index arrays and gathered
+    temporaries for the games taking it, and challenges and stores allocate the
+    candidate hands and strengths of ``_best``. Actions are integers, decoded per
+    game for the player to move:
+
+    - ``DECK_ACTION``: draw from the main deck.
+    - ``TREASURE_START + give * 52 + take``: swap hand card ``give`` for treasure card
+      ``take`` (card codes).
+    - ``challenge_action(offset, size, source)``: challenge the player ``offset`` seats
+      on with ``size`` cards; both sides play their strongest hand of that size (found
+      with ``PokerHand.evaluate_many``) and the winner draws from the main deck
+      (``source`` 0) or the treasure deck (``source`` 1).
+    - ``store_action``: store the strongest 5-card hand.
+
+    The masks follow the rules enforced by ``Game``: the 13-card limit, the empty
+    treasure and main decks, challenge eligibility, and storing needing a pair.
+    A masked-out action is a no-op, but the turn still passes as in ``Game.play``.
+
+    Attributes:
+        num_games (int): The number of games, K.
+        num_players (int): The number of players per game, P.
+        max_turns (int): The turn limit after which a game is scored as it stands.
+        deck (numpy.ndarray): ``(K, 52)`` card codes of each main deck, top at ``deck_size - 1``.
+        deck_size (numpy.ndarray): ``(K,)`` cards left in each main deck.
+        hands (numpy.ndarray): ``(K, P, 52)`` bool, the cards in each hand.
+        hand_size (numpy.ndarray): ``(K, P)`` cards in each hand.
+        treasure (numpy.ndarray): ``(K, 52)`` bool, the cards in each treasure deck.
+        treasure_size (numpy.ndarray): ``(K,)`` cards in each treasure deck.
+        stored_count (numpy.ndarray): ``(K, P)`` hands stored by each player.
+        stored_best (numpy.ndarray): ``(K, P)`` best stored hand rank of each player (0 if none).
+        current (numpy.ndarray): ``(K,)`` the player to move.
+        turn (numpy.ndarray): ``(K,)`` turns played.
+        done (numpy.ndarray): ``(K,)`` whether each game is over.
+        winner (numpy.ndarray): ``(K,)`` the winning seat of finished games, -1 otherwise.
+        rewards (numpy.ndarray): ``(K, P)`` 1.0 for the winner of a game that ended on the last step.
+        action_mask (numpy.ndarray): ``(K, num_actions)`` bool, the legal actions.
+    """
+
+    def __init__(self, num_games: int, num_players: int = 2, max_turns: int = 500, seed: Optional[int] = None):
+        if num_players not in (2, 3):
+            raise ValueError("VectorGame supports 2 or 3 players.")
+        k, p = num_games, num_players
+        self.num_games = k
+        self.num_players = p
+        self.max_turns = max_turns
+        self.rng = np.random.default_rng(seed)
+
+        self.deck = np.zeros((k, N_CARDS), dtype=np.int8)
+        self.deck_size = np.zeros(k, dtype=np.int16)
+        self.hands = np.zeros((k, p, N_CARDS), dtype=bool)
+        self.hand_size = np.zeros((k, p), dtype=np.int16)
+        self.treasure = np.zeros((k, N_CARDS), dtype=bool)
+        self.treasure_size = np.zeros(k, dtype=np.int16)
+        self.stored_count = np.zeros((k, p), dtype=np.int16)
+        self.stored_best = np.zeros((k, p), dtype=np.int8)
+        self.current = np.zeros(k, dtype=np.intp)
+        self.turn = np.zeros(k, dtype=np.int32)
+        self.done = np.zeros(k, dtype=bool)
+        self.winner = np.full(k, -1, dtype=np.int8)
+        self.rewards = np.zeros((k, p), dtype=np.float32)
+        # Arrival order of treasure cards; challenge draws take the oldest one.
+        self._stamp = np.full((k, N_CARDS), -1, dtype=np.int64)
+        self._clock = np.zeros(k, dtype=np.int64)
+        self._rows = np.arange(k)
+
+        self.store_action = CHALLENGE_START + (p - 1) * 3 * 2
+        self.num_actions = self.store_action + 1
+        self.action_mask = np.zeros((k, self.num_actions), dtype=bool)
+        self._swap_mask = self.action_mask[:, TREASURE_START:CHALLENGE_START].reshape(k, N_CARDS, N_CARDS)
+        assert np.shares_memory(self._swap_mask, self.action_mask)
+        self._flat_mask = self.action_mask.reshape(-1)
+        self._flat_hands = self.hands.reshape(k * p, N_CARDS)
+        self._flat_hand_size = self.hand_size.reshape(-1)
+
+        # Scratch buffers of step and _update_masks.
+        self._actions = np.zeros(k, dtype=np.intp)
+        self._index = np.zeros(k, dtype=np.intp)
+        self._seat = np.zeros(k, dtype=np.intp)
+        self._live = np.zeros(k, dtype=bool)
+        self._legal = np.zeros(k, dtype=bool)
+        self._chosen = np.zeros(k, dtype=bool)
+        self._flag = np.zeros(k, dtype=bool)
+        self._count = np.zeros(k, dtype=np.int16)
+        self._current_hand = np.zeros((k, N_CARDS), dtype=bool)
+        self._current_size = np.zeros(k, dtype=np.int16)
+        self._opponent_size = np.zeros(k, dtype=np.int16)
+        self._value_counts = np.zeros((k, 13), dtype=np.int8)
+        self._most = np.zeros(k, dtype=np.int8)
+
+        self.reset()
+
+    def challenge_action(self, offset: int, size: int, source: int) -> int:
+        return CHALLENGE_START + ((offset - 1) * 3 + (size - 3)) * 2 + source
+
+    @property
+    def observations(self) -> Dict[str, np.ndarray]:
+        return {
+            'hands': self.hands,
+            'hand_size': self.hand_size,
+            'treasure': self.treasure,
+            'stored_count': self.stored_count,
+            'deck_size': self.deck_size,
+            'current': self.current,
+        }
+
+    def reset(self, games: Optional[np.ndarray] = None, decks: Optional[np.ndarray] = None):
+        """
+        Deal new games.
+
+        Args:
+            games: The indices of the games to reset; all games by default.
+            decks: An ``(len(games), 52)`` array of shuffled card codes, top of the deck
+                last (see ``deals.shuffled_decks``); shuffled with the environment's
+                generator by default.
+        """
+        games = self._rows if games is None else np.asarray(games, dtype=np.intp)
+        if decks is None:
+            decks = shuffled_decks(len(games), self.rng)
+        self.deck[games] = decks
+        self.deck_size[games] = N_CARDS
+        self.hands[games] = False
+        self.hand_size[games] = 0
+        self.treasure[games] = False
+        self.treasure_size[games] = 0
+        self._stamp[games] = -1
+        self._clock[games] = 0
+        self.stored_count[games] = 0
+        self.stored_best[games] = 0
+        self.current[games] = 0
+        self.turn[games] = 0
+        self.done[games] = False
+        self.winner[games] = -1
+        self.rewards[games] = 0
+
+        # Deal exactly like Game.setup: 7 cards per player, then 9 treasure cards.
+        for player in range(self.num_players):
+            for _ in range(DEAL_SIZE):
+                self._give(games, player, self._pop_deck(games))
+        for _ in range(TREASURE_SIZE):
+            self._add_treasure(games, self._pop_deck(games))
+        self._update_masks()
+
+    def step(self, actions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Play one action in every unfinished game.
+
+        Args:
+            actions: A ``(K,)`` integer array of actions; ignored for finished games.
+
+        Returns:
+            Tuple[numpy.ndarray, numpy.ndarray]: The rewards and the done flags (views).
+        """
+        np.copyto(self._actions, actions, casting='unsafe')
+        actions = self._actions
+        live = np.logical_not(self.done, out=self._live)
+        # legal = action_mask[rows, actions] & live, without temporaries. The indices
+        # are always in range; mode='clip' stops np.take from buffering its output.
+        np.multiply(self._rows, self.num_actions, out=self._index)
+        np.add(self._index, actions, out=self._index)
+        legal = np.take(self._flat_mask, self._index, out=self._legal, mode='clip')
+        np.logical_and(legal, live, out=legal)
+        self.rewards.fill(0)
+
+        games = np.flatnonzero(self._actions_between(DECK_ACTION, TREASURE_START))
+        if games.size:
+            self._give(games, self.current[games], self._pop_deck(games))
+
+        games = np.flatnonzero(self._actions_between(TREASURE_START, CHALLENGE_START))
+        if games.size:
+            self._swap(games, actions[games] - TREASURE_START)
+
+        games = np.flatnonzero(self._actions_between(CHALLENGE_START, self.store_action))
+        if games.size:
+            self._challenge(games, actions[games] - CHALLENGE_START)
+
+        games = np.flatnonzero(self._actions_between(self.store_action, self.num_actions))
+        if games.size:
+            self._store(games)
+
+        # Finished games add 0, so they keep their player and turn count.
+        np.add(self.current, live, out=self.current)
+        np.remainder(self.current, self.num_players, out=self.current)
+        np.add(self.turn, live, out=self.turn)
+        self._finish()
+        self._update_masks()
+        return self.rewards, self.done
+
+    def _actions_between(self, start: int, stop: int) -> np.ndarray:
+        """Flag the games with a legal action in ``[start, stop)``, in a scratch buffer."""
+        chosen = np.greater_equal(self._actions, start, out=self._chosen)
+        np.logical_and(chosen, np.less(self._actions, stop, out=self._flag), out=chosen)
+        return np.logical_and(chosen, self._legal, out=chosen)
+
+    def _pop_deck(self, games: np.ndarray) -> np.ndarray:
+        self.deck_size[games] -= 1
+        return self.deck[games, self.deck_size[games]]
+
+    def _give(self, games: np.ndarray, players, codes: np.ndarray):
+        self.hands[games, players, codes] = True
+        self.hand_size[games, players] += 1
+
+    def _add_treasure(self, games: np.ndarray, codes: np.ndarray):
+        self.treasure[games, codes] = True
+        self.treasure_size[games] += 1
+        self._stamp[games, codes] = self._clock[games]
+        self._clock[games] += 1
+
+    def _pop_treasure(self, games: np.ndarray) -> np.ndarray:
+        stamps = self._stamp[games]
+        codes = np.where(stamps >= 0, stamps, np.iinfo(np.int64).max).argmin(axis=1)
+        self.treasure[games, codes] = False
+        self.treasure_size[games] -= 1
+        self._stamp[games, codes] = -1
+        return codes
+
+    def _swap(self, games: np.ndarray, swaps: np.ndarray):
+        give, take = np.divmod(swaps, N_CARDS)
+        players = self.current[games]
+        self.hands[games, players, give] = False
+        self.hands[games, players, take] = True
+        self.treasure[games, take] = False
+        self.treasure_size[games] -= 1
+        self._stamp[games, take] = -1
+        self._add_treasure(games, give)
+        refill = games[self.deck_size[games] > 0]
+        if refill.size:
+            self._add_treasure(refill, self._pop_deck(refill))
+
+    def _best(self, games: np.ndarray, players: np.ndarray, size: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the codes and hand rank of each player's strongest ``size``-card hand."""
+        sizes = self.hand_size[games, players]
+        held = self.hands[games, players]
+        count = int(sizes.max())
+        # Held card codes first, in code order.
+        codes = np.argsort(~held, axis=1, kind='stable')[:, :count]
+        subsets = _combinations(count, size)
+        candidates = codes[:, subsets]
+        categories, scores = PokerHand.evaluate_many(candidates.reshape(-1, size))
+        strengths = ((categories.astype(np.int64) << 20) | scores).reshape(len(games), len(subsets))
+        strengths[subsets.max(axis=1)[None, :] >= sizes[:, None]] = -1
+        best = strengths.argmax(axis=1)
+        rows = np.arange(len(games))
+        return candidates[rows, best], strengths[rows, best] >> 20
+
+    def _challenge(self, games: np.ndarray, choices: np.ndarray):
+        choices, sources = np.divmod(choices, 2)
+        offsets, sizes = np.divmod(choices, 3)
+        sizes += 3
+        challengers = self.current[games]
+        opponents = (challengers + offsets + 1) % self.num_players
+
+        challenger_rank = np.zeros(len(games), dtype=np.int64)
+        opponent_rank = np.zeros(len(games), dtype=np.int64)
+        for size in (3, 4, 5):
+            chosen = np.flatnonzero(sizes == size)
+            if chosen.size:
+                challenger_rank[chosen] = self._best(games[chosen], challengers[chosen], size)[1]
+                opponent_rank[chosen] = self._best(games[chosen], opponents[chosen], size)[1]
+
+        won = challenger_rank > opponent_rank
+        winners = np.where(won, challengers, opponents)
+        draws = np.where(won, challenger_rank, opponent_rank)
+
+        drawing = np.ones(len(games), dtype=bool)
+        for drawn in range(PokerHand.ROYAL_FLUSH):
+            drawing &= (draws > drawn) & (self.hand_size[games, winners] < HAND_LIMIT)
+            from_treasure = drawing & (sources == 1) & (self.treasure_size[games] > 0)
+            from_main = drawing & (sources == 0) & (self.deck_size[games] > 0)
+            drawing &= from_treasure | from_main
+            if not drawing.any():
+                break
+
+            chosen = np.flatnonzero(from_treasure)
+            if chosen.size:
+                self._give(games[chosen], winners[chosen], self._pop_treasure(games[chosen]))
+                refill = games[chosen][self.deck_size[games[chosen]] > 0]
+                if refill.size:
+                    self._add_treasure(refill, self._pop_deck(refill))
+            chosen = np.flatnonzero(from_main)
+            if chosen.size:
+                self._give(games[chosen], winners[chosen], self._pop_deck(games[chosen]))
+
+    def _store(self, games: np.ndarray):
+        players = self.current[games]
+        codes, ranks = self._best(games, players, 5)
+        valid = ranks > PokerHand.HIGH_CARD
+        games, players, codes, ranks = games[valid], players[valid], codes[valid], ranks[valid]
+        self.hands[games[:, None], players[:, None], codes] = False
+        self.hand_size[games, players] -= 5
+        self.stored_count[games, players] += 1
+        self.stored_best[games, players] = np.maximum(self.stored_best[games, players], ranks)
+
+    def _finish(self):
+        # over = live & (every deck and hand empty | turn limit reached)
+        over = np.equal(self.deck_size, 0, out=self._chosen)
+        np.logical_and(over, np.equal(self.treasure_size, 0, out=self._flag), out=over)
+        np.sum(self.hand_size, axis=1, out=self._count)
+        np.logical_and(over, np.equal(self._count, 0, out=self._flag), out=over)
+        np.logical_or(over, np.greater_equal(self.turn, self.max_turns, out=self._flag), out=over)
+        np.logical_and(over, self._live, out=over)
+        if not over.any():
+            return
+        games = np.flatnonzero(over)
+        # Ties are broken at random, as in Game.determine_winner.
+        noise = self.rng.random((len(games), self.num_players))
+        winners = (self.stored_best[games] + noise * 0.5).argmax(axis=1)
+        self.done[games] = True
+        self.winner[games] = winners
+        self.rewards[games, winners] = 1.0
+
+    def _update_masks(self):
+        mask = self.action_mask
+        players = self.num_players
+        # Gather the current player's hand through flat (game * P + seat) indices.
+        np.multiply(self._rows, players, out=self._index)
+        np.add(self._index, self.current, out=self._index)
+        np.take(self._flat_hands, self._index, axis=0, out=self._current_hand, mode='clip')
+        size = np.take(self._flat_hand_size, self._index, out=self._current_size, mode='clip')
+        flag, chosen = self._flag, self._chosen
+
+        np.less(size, HAND_LIMIT, out=flag)
+        np.logical_and(flag, np.greater(self.deck_size, 0, out=chosen), out=mask[:, DECK_ACTION])
+        np.logical_and(self._current_hand[:, :, None], self.treasure[:, None, :], out=self._swap_mask)
+        for offset in range(1, players):
+            np.add(self.current, offset, out=self._seat)
+            np.remainder(self._seat, players, out=self._seat)
+            np.multiply(self._rows, players, out=self._index)
+            np.add(self._index, self._seat, out=self._index)
+            opponent_size = np.take(self._flat_hand_size, self._index, out=self._opponent_size, mode='clip')
+            for challenge_size in (3, 4, 5):
+                np.greater_equal(size, challenge_size, out=flag)
+                np.logical_and(flag, np.greater_equal(opponent_size, challenge_size, out=chosen), out=flag)
+                for source in (0, 1):
+                    mask[:, self.challenge_action(offset, challenge_size, source)] = flag
+        np.sum(self._current_hand.reshape(-1, 4, 13), axis=1, out=self._value_counts)
+        np.max(self._value_counts, axis=1, out=self._most)
+        np.greater_equal(self._most, 2, out=flag)
+        np.logical_and(flag, np.greater_equal(size, 5, out=chosen), out=mask[:, self.store_action])
+        np.logical_not(self.done, out=flag)
+        np.logical_and(mask, flag[:, None], out=mask)